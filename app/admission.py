@@ -0,0 +1,181 @@
+"""
+Admission control для загрузок: быстрый отказ вместо роста очереди и
+таймаутов, когда конвейер не успевает.
+
+- 429 — клиент превысил свой token bucket (UPLOAD_RATE_LIMIT).
+- 503 — перегружен конвейер: глубина очереди, занятость пула БД или
+  свободное место в PATH_TO_IMAGE за порогом.
+
+Оба ответа с Retry-After. Глубина очереди и место на диске обновляются
+фоновой задачей раз в ADMISSION_REFRESH_INTERVAL, поэтому проверка на
+запрос не ходит ни в брокер, ни в файловую систему.
+"""
+import asyncio
+import logging
+import math
+import shutil
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from fastapi import Request
+
+from app.database import pool_usage
+from app.job_queue import get_job_queue
+from app.metrics import JOB_QUEUE_DEPTH
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+# Маршруты, на которые распространяется admission control
+ADMISSION_ROUTES = {("POST", "/image"), ("POST", "/uploads")}
+
+
+@dataclass
+class Rejection:
+    status_code: int
+    retry_after: int
+    reason: str
+    detail: str
+
+
+class TokenBucket:
+    """
+    Token bucket на ключ клиента. Хранит не больше max_clients ключей,
+    давно не приходившие вытесняются первыми.
+    """
+
+    def __init__(
+            self,
+            rate: float,
+            burst: int,
+            max_clients: int = 10000,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self.buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    def take(self, key: str, now: float | None = None) -> float:
+        """
+        Забирает токен. Возвращает 0, если запрос разрешён, иначе — через
+        сколько секунд появится токен.
+        """
+        now = time.monotonic() if now is None else now
+        tokens, updated = self.buckets.pop(key, (float(self.burst), now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / self.rate
+        self.buckets[key] = (tokens, now)
+        if len(self.buckets) > self.max_clients:
+            self.buckets.popitem(last=False)
+        return wait
+
+
+class AdmissionController:
+    def __init__(self) -> None:
+        self.max_queue_depth = settings.ADMISSION_MAX_QUEUE_DEPTH
+        self.max_pool_usage = settings.ADMISSION_MAX_POOL_USAGE
+        self.min_free_disk = settings.ADMISSION_MIN_FREE_DISK_MB * MB
+        self.retry_after = settings.ADMISSION_RETRY_AFTER
+        self.refresh_interval = settings.ADMISSION_REFRESH_INTERVAL
+        self.rate_limiter = None
+        if settings.UPLOAD_RATE_LIMIT > 0:
+            self.rate_limiter = TokenBucket(
+                settings.UPLOAD_RATE_LIMIT,
+                settings.UPLOAD_RATE_BURST,
+            )
+        # None — значение неизвестно (брокер или диск недоступны);
+        # по неизвестному не отказываем.
+        self.queue_depth: int | None = None
+        self.free_disk: int | None = None
+        self.refresh_task: asyncio.Task | None = None
+
+    async def refresh(self) -> None:
+        try:
+            self.queue_depth = await get_job_queue().queue_depth()
+            JOB_QUEUE_DEPTH.set(self.queue_depth)
+        except Exception as e:
+            # Пишем один раз при переходе в «неизвестно», а не каждый цикл.
+            if self.queue_depth is not None:
+                logger.warning("Queue depth unavailable:", exc_info=e)
+            self.queue_depth = None
+        try:
+            usage = await asyncio.to_thread(
+                shutil.disk_usage,
+                settings.PATH_TO_IMAGE,
+            )
+            self.free_disk = usage.free
+        except OSError as e:
+            if self.free_disk is not None:
+                logger.warning("Disk usage unavailable:", exc_info=e)
+            self.free_disk = None
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self) -> None:
+        if not self.refresh_task:
+            self.refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self.refresh_task:
+            self.refresh_task.cancel()
+            await asyncio.gather(self.refresh_task, return_exceptions=True)
+            self.refresh_task = None
+
+    def overload_reason(self) -> str | None:
+        if (
+            self.queue_depth is not None
+            and self.queue_depth >= self.max_queue_depth
+        ):
+            return "queue_depth"
+        if pool_usage() >= self.max_pool_usage:
+            return "db_pool"
+        if self.free_disk is not None and self.free_disk < self.min_free_disk:
+            return "disk_space"
+        return None
+
+    def check(self, client: str) -> Rejection | None:
+        if self.rate_limiter:
+            wait = self.rate_limiter.take(client)
+            if wait:
+                return Rejection(
+                    429,
+                    math.ceil(wait),
+                    "rate_limit",
+                    "Слишком много загрузок, повторите позже.",
+                )
+        reason = self.overload_reason()
+        if reason:
+            return Rejection(
+                503,
+                self.retry_after,
+                reason,
+                "Сервис перегружен, повторите позже.",
+            )
+        return None
+
+
+admission_controller = None
+
+
+def get_admission_controller() -> AdmissionController:
+    global admission_controller
+    if admission_controller is None:
+        admission_controller = AdmissionController()
+    return admission_controller
+
+
+def client_key(request: Request) -> str:
+    if settings.TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
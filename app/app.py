@@ -1,28 +1,57 @@
+import asyncio
 import logging
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI
 
+from app.admission import get_admission_controller
 from app.database import initialize_db, shutdown
+from app.job_queue import get_job_queue
 from app.logging.logging import setup_logging
-from app.rabbit_producer import get_rabbit_producer
+from app.middlewares import (admission_middleware, metrics_middleware,
+                             trace_middleware)
 from app.routers.health_check_router import health_check_router
 from app.routers.image_router import image_router
+from app.routers.metrics_router import metrics_router
+from app.routers.upload_router import upload_router
+from app.services.health_check_service import get_health_check_service
+from app.services.partition_service import ensure_partitions
+from app.services.reaper_service import run_reaper
+from app.settings import settings
+from app.tracing import setup_tracing
 
 setup_logging()
+setup_tracing(settings.TRACE_EXPORT_PATH)
 logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("App starting...")
-    producer = get_rabbit_producer()
-    await producer.connect()
-    await initialize_db()
+    producer = get_job_queue()
+    # Соединения с брокером и БД открываются параллельно и до первого
+    # запроса: ни один запрос не платит за установку соединения.
+    await asyncio.gather(producer.connect(), initialize_db())
+    await ensure_partitions()
+    admission_controller = get_admission_controller()
+    admission_controller.start()
+    health_check_service = get_health_check_service()
+    health_check_service.start()
+    reaper_task = None
+    if settings.QUEUE_BACKEND == "inprocess":
+        # Отдельного reaper-контейнера нет, а задачи из памяти теряются
+        # при рестарте — подбираем их здесь же.
+        reaper_task = asyncio.create_task(run_reaper(producer))
 
     yield
-    await shutdown()
+    await health_check_service.stop()
+    await admission_controller.stop()
+    if reaper_task:
+        reaper_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await reaper_task
     await producer.close()
+    await shutdown()
     logger.info("App shutting down...")
 
 
@@ -32,5 +61,13 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Отказы admission control тоже попадают в метрики и трейсы.
+app.middleware("http")(admission_middleware)
+app.middleware("http")(metrics_middleware)
+# Добавленный последним выполняется первым: трейс охватывает весь запрос.
+app.middleware("http")(trace_middleware)
+
 app.include_router(image_router)
+app.include_router(upload_router)
 app.include_router(health_check_router)
+app.include_router(metrics_router)
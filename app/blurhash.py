@@ -0,0 +1,112 @@
+"""
+Кодировщик BlurHash (https://blurha.sh) для маленьких изображений.
+
+На вход ожидается уже уменьшенная картинка (десятки пикселей по стороне):
+сложность O(w * h * x_components * y_components).
+"""
+import math
+
+from PIL import Image as PILImage
+
+BASE83_CHARS = (
+    "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    "abcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+)
+
+
+def _base83(value: int, length: int) -> str:
+    result = ""
+    for i in range(1, length + 1):
+        digit = (value // 83 ** (length - i)) % 83
+        result += BASE83_CHARS[digit]
+    return result
+
+
+def _srgb_to_linear(value: int) -> float:
+    v = value / 255
+    if v <= 0.04045:
+        return v / 12.92
+    return ((v + 0.055) / 1.055) ** 2.4
+
+
+def _linear_to_srgb(value: float) -> int:
+    v = max(0.0, min(1.0, value))
+    if v <= 0.0031308:
+        return int(v * 12.92 * 255 + 0.5)
+    return int((1.055 * v ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def _sign_pow(value: float, exp: float) -> float:
+    return math.copysign(abs(value) ** exp, value)
+
+
+def encode(
+        image: PILImage.Image,
+        x_components: int = 4,
+        y_components: int = 3,
+) -> str:
+    if not (1 <= x_components <= 9 and 1 <= y_components <= 9):
+        raise ValueError("BlurHash components must be between 1 and 9")
+
+    image = image.convert("RGB")
+    width, height = image.size
+    srgb_to_linear = [_srgb_to_linear(v) for v in range(256)]
+    data = image.tobytes()
+    pixels = [
+        (srgb_to_linear[r], srgb_to_linear[g], srgb_to_linear[b])
+        for r, g, b in zip(data[0::3], data[1::3], data[2::3])
+    ]
+    cos_x = [
+        [math.cos(math.pi * i * x / width) for x in range(width)]
+        for i in range(x_components)
+    ]
+    cos_y = [
+        [math.cos(math.pi * j * y / height) for y in range(height)]
+        for j in range(y_components)
+    ]
+
+    factors = []
+    for j in range(y_components):
+        for i in range(x_components):
+            normalisation = 1 if i == 0 and j == 0 else 2
+            r = g = b = 0.0
+            for y in range(height):
+                row_basis = normalisation * cos_y[j][y]
+                row = pixels[y * width:(y + 1) * width]
+                for x, (pr, pg, pb) in enumerate(row):
+                    basis = row_basis * cos_x[i][x]
+                    r += basis * pr
+                    g += basis * pg
+                    b += basis * pb
+            scale = 1 / (width * height)
+            factors.append((r * scale, g * scale, b * scale))
+
+    dc, ac = factors[0], factors[1:]
+    result = _base83((x_components - 1) + (y_components - 1) * 9, 1)
+
+    if ac:
+        actual_max = max(abs(v) for factor in ac for v in factor)
+        quantised_max = max(0, min(82, math.floor(actual_max * 166 - 0.5)))
+        max_value = (quantised_max + 1) / 166
+        result += _base83(quantised_max, 1)
+    else:
+        max_value = 1.0
+        result += _base83(0, 1)
+
+    dc_value = (
+        (_linear_to_srgb(dc[0]) << 16)
+        + (_linear_to_srgb(dc[1]) << 8)
+        + _linear_to_srgb(dc[2])
+    )
+    result += _base83(dc_value, 4)
+
+    for factor in ac:
+        quant = [
+            max(0, min(18, math.floor(
+                _sign_pow(v / max_value, 0.5) * 9 + 9.5
+            )))
+            for v in factor
+        ]
+        result += _base83(quant[0] * 19 * 19 + quant[1] * 19 + quant[2], 2)
+
+    return result
@@ -0,0 +1,89 @@
+"""
+Потоковая отдача нескольких файлов одним ответом: ZIP без сжатия
+(JPEG всё равно не сожмётся) или multipart/mixed. Архив собирается на
+лету по мере чтения файлов, в памяти — только текущий кусок.
+"""
+import io
+import time
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator
+
+from aiofile import async_open
+
+CHUNK_SIZE = 256 * 1024
+
+
+@dataclass
+class DownloadFile:
+    name: str
+    path: Path
+    size: int
+
+
+class _ChunkBuffer(io.RawIOBase):
+    """
+    Несдвигаемый поток для zipfile: запись копится до drain(). Без seek
+    zipfile пишет CRC и размеры в data descriptor после данных, а не
+    возвращается к локальному заголовку.
+    """
+
+    def __init__(self) -> None:
+        self.chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+async def read_chunks(path: Path) -> AsyncIterator[bytes]:
+    async with async_open(path, "rb") as file:
+        while chunk := await file.read(CHUNK_SIZE):
+            yield chunk
+
+
+async def zip_stream(files: list[DownloadFile]) -> AsyncIterator[bytes]:
+    buffer = _ChunkBuffer()
+    date_time = time.localtime()[:6]
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+        for file in files:
+            info = zipfile.ZipInfo(file.name, date_time)
+            # Размер заранее, чтобы zipfile сам решил, нужен ли ZIP64.
+            info.file_size = file.size
+            with archive.open(info, "w") as entry:
+                async for chunk in read_chunks(file.path):
+                    entry.write(chunk)
+                    if data := buffer.drain():
+                        yield data
+            # Data descriptor пишется при закрытии записи.
+            if data := buffer.drain():
+                yield data
+    # Центральный каталог — при закрытии архива.
+    yield buffer.drain()
+
+
+async def multipart_stream(
+        files: list[DownloadFile],
+        boundary: str,
+        content_type: str,
+) -> AsyncIterator[bytes]:
+    for file in files:
+        yield (
+            f"--{boundary}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f'Content-Disposition: attachment; filename="{file.name}"\r\n'
+            f"Content-Length: {file.size}\r\n\r\n"
+        ).encode()
+        async for chunk in read_chunks(file.path):
+            yield chunk
+        yield b"\r\n"
+    yield f"--{boundary}--\r\n".encode()
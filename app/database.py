@@ -1,50 +1,179 @@
-from sqlalchemy import text
-from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
-                                    create_async_engine)
+import asyncio
+from contextlib import AsyncExitStack
+from itertools import cycle
+from typing import Iterator, cast
+from uuid import uuid4
 
+from sqlalchemy import QueuePool, text
+from sqlalchemy.ext.asyncio import (AsyncEngine, AsyncSession,
+                                    async_sessionmaker, create_async_engine)
+
+from app.metrics import (DB_POOL_CHECKED_OUT, DB_POOL_CHECKOUT_WAIT,
+                         DB_POOL_OVERFLOW, DB_POOL_SIZE)
 from app.settings import settings
 
-async_engine = create_async_engine(
-    url=settings.database_url,
-    pool_size=settings.POOL_SIZE,
-    max_overflow=settings.MAX_OVERFLOW,
-    pool_timeout=10,
-    pool_recycle=3600,
-    connect_args={
+
+def connect_args() -> dict:
+    args: dict = {
         "server_settings": {
             "application_name": "image_",
             "tcp_keepalives_idle": "30",
             "tcp_keepalives_interval": "10",
             "tcp_keepalives_count": "5",
         },
-    },
-    echo=False,
-)
+    }
+    if settings.PGBOUNCER_MODE:
+        # В transaction mode PgBouncer отдаёт каждую транзакцию любому
+        # серверному соединению: подготовленное на одном выражение не
+        # найдётся на другом, а одинаковые имена конфликтуют.
+        args["statement_cache_size"] = 0
+        args["prepared_statement_cache_size"] = 0
+        args["prepared_statement_name_func"] = (
+            lambda: f"__asyncpg_{uuid4()}__"
+        )
+    else:
+        args["prepared_statement_cache_size"] = (
+            settings.PREPARED_STATEMENT_CACHE_SIZE
+        )
+    return args
+
+
+def make_engine(url: str, pool_size: int) -> AsyncEngine:
+    return create_async_engine(
+        url=url,
+        pool_size=pool_size,
+        max_overflow=settings.MAX_OVERFLOW,
+        pool_timeout=10,
+        pool_recycle=3600,
+        connect_args=connect_args(),
+        echo=False,
+    )
 
 
-session_gen = async_sessionmaker(
-    bind=async_engine,
+async_engine: AsyncEngine | None = None
+replica_engines: list[AsyncEngine] = []
+next_replica: Iterator[AsyncEngine] = iter(())
+
+session_factory = async_sessionmaker(
     class_=AsyncSession,
     expire_on_commit=False,
     autoflush=False,
 )
 
 
-async def initialize_db():
-    async with async_engine.connect() as conn:
-        await conn.execute(text("SELECT 1"))
+def get_engine() -> AsyncEngine:
+    """
+    Движки создаются при первом обращении, а не при импорте: импорт
+    модуля не тянет asyncpg и не создаёт пулы.
+    """
+    global async_engine, replica_engines, next_replica
+    if async_engine is None:
+        async_engine = make_engine(settings.database_url, settings.POOL_SIZE)
+        replica_engines = [
+            make_engine(url, settings.REPLICA_POOL_SIZE)
+            for url in settings.replica_urls
+        ]
+        next_replica = cycle(replica_engines)
+        pool = cast(QueuePool, async_engine.pool)
+        DB_POOL_SIZE.set_function(pool.size)
+        DB_POOL_CHECKED_OUT.set_function(pool.checkedout)
+        DB_POOL_OVERFLOW.set_function(lambda: max(pool.overflow(), 0))
+    return async_engine
+
+
+def session_gen(bind: AsyncEngine | None = None) -> AsyncSession:
+    return session_factory(bind=bind or get_engine())
+
+
+def pool_usage() -> float:
+    """Доля занятых соединений от POOL_SIZE + MAX_OVERFLOW."""
+    if async_engine is None:
+        return 0.0
+    pool = cast(QueuePool, async_engine.pool)
+    capacity = pool.size() + settings.MAX_OVERFLOW
+    return pool.checkedout() / capacity if capacity else 0.0
+
+
+def pool_stats() -> dict:
+    if async_engine is None:
+        return {"size": 0, "checked_out": 0, "overflow": 0, "usage": 0.0}
+    pool = cast(QueuePool, async_engine.pool)
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "usage": round(pool_usage(), 3),
+    }
+
+
+async def warm_engine(engine: AsyncEngine, connections: int) -> None:
+    """
+    Открывает connections соединений одновременно и возвращает их в пул,
+    чтобы первые запросы не платили за TCP, TLS и аутентификацию.
+    """
+    async with AsyncExitStack() as stack:
+        conns = await asyncio.gather(*(
+            stack.enter_async_context(engine.connect())
+            for _ in range(connections)
+        ))
+        for conn in conns:
+            await conn.execute(text("SELECT 1"))
+
+
+async def initialize_db() -> None:
+    """Проверка подключения и прогрев POOL_PREWARM соединений пула."""
+    primary = get_engine()
+    # Больше размера пула прогревать бессмысленно: лишние соединения
+    # закроются при возврате. Хотя бы одно — проверка подключения, в том
+    # числе к каждой реплике.
+    await asyncio.gather(
+        warm_engine(
+            primary,
+            max(min(settings.POOL_PREWARM, settings.POOL_SIZE), 1),
+        ),
+        *(
+            warm_engine(
+                engine,
+                max(min(settings.POOL_PREWARM, settings.REPLICA_POOL_SIZE), 1),
+            )
+            for engine in replica_engines
+        ),
+    )
 
 
 async def shutdown():
+    if async_engine is None:
+        return
     await async_engine.dispose()
+    for engine in replica_engines:
+        await engine.dispose()
+
+
+def is_replica(session: AsyncSession) -> bool:
+    return session.bind in replica_engines
 
 
 async def get_async_db_session():
     async with session_gen() as session:
         try:
+            # Берём соединение сразу, чтобы измерить ожидание пула.
+            with DB_POOL_CHECKOUT_WAIT.time():
+                await session.connection()
             yield session
         except Exception as e:
             await session.rollback()
             raise e
         finally:
             await session.close()
+
+
+async def get_async_read_session():
+    """
+    Сессия для идемпотентного чтения: по очереди на каждую реплику, без
+    реплик — на primary. Реплика может отставать, поэтому читающий код
+    сам перечитывает с primary то, что не нашёл (см. is_replica).
+    """
+    primary = get_engine()
+    bind = next(next_replica) if replica_engines else primary
+    async with session_gen(bind=bind) as session:
+        yield session
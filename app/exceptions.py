@@ -6,6 +6,32 @@ class FileTooBig(Exception):
     pass
 
 
+class InvalidImage(Exception):
+    pass
+
+
+class ImageTooManyPixels(Exception):
+    pass
+
+
+class UploadNotFound(Exception):
+    pass
+
+
+class UploadOffsetMismatch(Exception):
+    def __init__(self, offset: int) -> None:
+        super().__init__(f"Expected offset {offset}")
+        self.offset = offset
+
+
+class UploadInProgress(Exception):
+    pass
+
+
+class UploadIncomplete(Exception):
+    pass
+
+
 class ImageNotFound(Exception):
     pass
 
@@ -22,5 +48,5 @@ class DBHealtCheckException(Exception):
     pass
 
 
-class RabbitHealthCheckException(Exception):
+class QueueHealthCheckException(Exception):
     pass
@@ -0,0 +1,62 @@
+"""
+UUIDv7 (RFC 9562) для первичных ключей images.
+
+Старшие 48 бит — миллисекунды Unix time, поэтому новые id растут и
+вставки идут в правый край B-дерева, а не в случайные страницы, как с
+uuid4. Внутри одной миллисекунды порядок держит 12-битный счётчик в
+rand_a (метод 1 из RFC 9562, раздел 6.2). Тип тот же — UUID, старые v4
+строки остаются как есть.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+# Насколько created_at (часы и часовой пояс БД) может расходиться со
+# временем в id (часы API) — с запасом на разные пояса сессии.
+CREATED_AT_SLACK = timedelta(days=1)
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+
+def uuid7() -> UUID:
+    global _last_ms, _counter
+    with _lock:
+        ms = time.time_ns() // 1_000_000
+        if ms > _last_ms:
+            _last_ms = ms
+            # Случайный старт в нижней половине оставляет место под
+            # счётчик и не раскрывает число id за миллисекунду.
+            _counter = int.from_bytes(os.urandom(2)) & 0x7FF
+        else:
+            # Та же миллисекунда или часы ушли назад: id всё равно растёт.
+            _counter += 1
+            if _counter > 0xFFF:
+                _last_ms += 1
+                _counter = 0
+        ms, counter = _last_ms, _counter
+    rand_b = int.from_bytes(os.urandom(8)) & ((1 << 62) - 1)
+    return UUID(int=(
+        ms << 80 | 0x7 << 76 | counter << 64 | 0b10 << 62 | rand_b
+    ))
+
+
+def uuid7_time(id: UUID) -> datetime | None:
+    """Время создания из UUIDv7 (UTC, без пояса); для других версий None."""
+    if id.version != 7:
+        return None
+    ms = id.int >> 80
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).replace(
+        tzinfo=None,
+    )
+
+
+def created_at_window(id: UUID) -> tuple[datetime, datetime] | None:
+    """Диапазон created_at, в котором точно лежит строка с этим id."""
+    created = uuid7_time(id)
+    if created is None:
+        return None
+    return created - CREATED_AT_SLACK, created + CREATED_AT_SLACK
@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+from app.logging.logging import setup_logging
+from app.metrics import QUEUE_PUBLISH_DURATION
+from app.tracing import current_traceparent, span
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Job:
+    image_id: str
+    published_at: float
+    traceparent: str | None
+
+
+class InProcessQueue:
+    """
+    Очередь задач внутри процесса API для установки на одной машине и
+    нагрузочных тестов без RabbitMQ.
+
+    concurrency задач берутся из asyncio.Queue и обрабатываются тем же
+    кодом, что и в worker.py; Pillow работает в пуле из processes
+    процессов, чтобы не занимать GIL процесса API. Очередь не переживает
+    рестарт: оставшиеся в NEW/PROCESSING изображения подбирает reaper,
+    который в этом режиме запускается в lifespan приложения.
+    """
+
+    def __init__(
+            self,
+            queue_name: str,
+            concurrency: int,
+            processes: int,
+    ) -> None:
+        self.queue_name = queue_name
+        self.concurrency = concurrency
+        self.processes = processes
+        self.queue: asyncio.Queue[Job] = asyncio.Queue()
+        self.executor: ProcessPoolExecutor | None = None
+        self.consumers: list[asyncio.Task] = []
+
+    async def connect(self) -> None:
+        if self.consumers:
+            return
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            # Дочерним процессам нужен свой поток вывода логов.
+            initializer=setup_logging,
+        )
+        self.consumers = [
+            asyncio.create_task(self._consume())
+            for _ in range(self.concurrency)
+        ]
+        logger.info(
+            f"In-process queue started: {self.concurrency} consumers, "
+            f"{self.processes} processes"
+        )
+
+    async def send_message(self, message: dict) -> None:
+        if not self.consumers:
+            logger.error("In-process queue not started")
+            raise RuntimeError("In-process queue not started")
+        with span("queue.publish", queue=self.queue_name), \
+                QUEUE_PUBLISH_DURATION.labels(self.queue_name).time():
+            await self.queue.put(Job(
+                message["image_id"],
+                time.time(),
+                current_traceparent(),
+            ))
+        logger.info(f" [x] Queued {message}")
+
+    async def queue_depth(self) -> int:
+        if not self.consumers or all(c.done() for c in self.consumers):
+            raise RuntimeError("In-process queue not started")
+        return self.queue.qsize()
+
+    async def _consume(self) -> None:
+        # worker.py настраивает логирование и создаёт продюсер медленной
+        # очереди при импорте — импортируем, только когда режим включён.
+        from worker import LANE_INPROCESS, run_job
+
+        while True:
+            job = await self.queue.get()
+            try:
+                await run_job(
+                    job.image_id,
+                    LANE_INPROCESS,
+                    job.published_at,
+                    job.traceparent,
+                    self.executor,
+                )
+            except Exception as e:
+                logger.error(
+                    f"[!] In-process job {job.image_id} failed:",
+                    exc_info=e,
+                )
+            finally:
+                self.queue.task_done()
+
+    async def close(self) -> None:
+        for consumer in self.consumers:
+            consumer.cancel()
+        await asyncio.gather(*self.consumers, return_exceptions=True)
+        self.consumers = []
+        if self.executor:
+            await asyncio.to_thread(
+                self.executor.shutdown,
+                wait=True,
+                cancel_futures=True,
+            )
+            self.executor = None
@@ -0,0 +1,40 @@
+from typing import Protocol
+
+from app.settings import settings
+
+
+class JobQueue(Protocol):
+    """Куда API и reaper отправляют задачи на генерацию миниатюр."""
+
+    queue_name: str
+
+    async def connect(self) -> None: ...
+
+    async def send_message(self, message: dict) -> None: ...
+
+    async def queue_depth(self) -> int: ...
+
+    async def close(self) -> None: ...
+
+
+job_queue: JobQueue | None = None
+
+
+def get_job_queue() -> JobQueue:
+    """Очередь, выбранная QUEUE_BACKEND."""
+    global job_queue
+    if job_queue is None:
+        # Импорт бэкенда здесь: в режиме inprocess aio_pika не нужен.
+        if settings.QUEUE_BACKEND == "inprocess":
+            from app.inprocess_queue import InProcessQueue
+
+            job_queue = InProcessQueue(
+                settings.QUEUE_NAME,
+                settings.WORKER_PREFETCH,
+                settings.INPROCESS_WORKERS,
+            )
+        else:
+            from app.rabbit_producer import get_rabbit_producer
+
+            job_queue = get_rabbit_producer()
+    return job_queue
@@ -1,33 +1,76 @@
 import logging
+import random
 import sys
+from typing import TextIO
 
-from pythonjsonlogger import jsonlogger
+from pythonjsonlogger.orjson import OrjsonFormatter
 
+from app.logging.queued import attach_queued
+from app.settings import settings
+from app.tracing import span_id_var, trace_id_var
 
-def setup_logging(level: str = "INFO") -> None:
+
+class TraceContextFilter(logging.Filter):
+    """
+    Добавляет trace_id и span_id из contextvars в каждую запись.
+    Значения берутся в момент вызова логгера, в контексте запроса/задачи.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = trace_id_var.get()
+        record.span_id = span_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Пропускает долю rate записей DEBUG/INFO; WARNING и выше — все."""
+
+    def __init__(self, rate: float) -> None:
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.rate >= 1:
+            return True
+        return random.random() < self.rate
+
+
+def setup_logging(
+        level: str | None = None,
+        sample_rate: float | None = None,
+        stream: TextIO | None = None,
+) -> None:
     """
     Настраивает логирование в JSON формате.
     Все логи пишутся в stdout (для корректной работы в Docker).
+
+    Вызывающий поток только кладёт запись в очередь; сериализация (orjson)
+    и запись в stdout идут в фоновом потоке QueueListener, поэтому
+    логирование не блокирует event loop.
     """
 
     # создаём root-логгер
     logger = logging.getLogger()
-    logger.setLevel(level.upper())
-
-    # если хендлеры уже есть — очищаем
-    if logger.handlers:
-        logger.handlers.clear()
+    logger.setLevel((level or settings.LOG_LEVEL).upper())
 
     # пишем в stdout
-    log_handler = logging.StreamHandler(sys.stdout)
+    log_handler = logging.StreamHandler(stream or sys.stdout)
 
     # формат JSON
-    formatter = jsonlogger.JsonFormatter(
-        "%(asctime)s %(name)s %(levelname)s %(message)s"
+    formatter = OrjsonFormatter(
+        "%(asctime)s %(name)s %(levelname)s %(message)s "
+        "%(trace_id)s %(span_id)s"
     )
-
     log_handler.setFormatter(formatter)
-    logger.addHandler(log_handler)
+
+    # если хендлеры уже есть — attach_queued их закроет
+    queue_handler = attach_queued(logger, log_handler, settings.LOG_QUEUE_SIZE)
+    # Фильтры работают в вызывающем потоке: сэмплирование экономит
+    # очередь, а contextvars трассировки доступны только здесь.
+    if sample_rate is None:
+        sample_rate = settings.LOG_SAMPLE_RATE
+    queue_handler.addFilter(SamplingFilter(sample_rate))
+    queue_handler.addFilter(TraceContextFilter())
 
     logging.getLogger("uvicorn.access").handlers.clear()
     logging.getLogger("uvicorn.error").handlers.clear()
@@ -0,0 +1,81 @@
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Кладёт запись в очередь и сразу возвращает управление: форматирование
+    и запись в поток делает QueueListener в своём потоке.
+
+    При переполнении очереди DEBUG/INFO отбрасываются сразу, WARNING и
+    выше ждут места не дольше warning_timeout: если вывод встал, event
+    loop не должен встать вместе с ним.
+    """
+
+    listener: QueueListener | None = None
+
+    def __init__(
+            self,
+            log_queue: queue.Queue,
+            warning_timeout: float = 0.1,
+    ) -> None:
+        super().__init__(log_queue)
+        self.log_queue = log_queue
+        self.warning_timeout = warning_timeout
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Стандартный prepare() форматирует запись целиком и склеивает
+        # traceback с сообщением, а JSON-форматтеру нужны поля по
+        # отдельности. Подставляем только args: объекты могут измениться
+        # до того, как до записи дойдёт слушатель. Запись не копируем —
+        # других хендлеров у root-логгера нет.
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            if record.levelno >= logging.WARNING:
+                self.log_queue.put(record, timeout=self.warning_timeout)
+            else:
+                self.log_queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self) -> None:
+        atexit.unregister(self.close)
+        if self.listener:
+            self.listener.stop()
+            self.listener = None
+        super().close()
+
+
+def attach_queued(
+        logger: logging.Logger,
+        handler: logging.Handler,
+        maxsize: int,
+) -> NonBlockingQueueHandler:
+    """
+    Подключает handler к logger через очередь и фоновый поток.
+    Прежние хендлеры логгера закрываются.
+    """
+    for old_handler in logger.handlers[:]:
+        logger.removeHandler(old_handler)
+        old_handler.close()
+
+    queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize))
+    listener = QueueListener(
+        queue_handler.log_queue,
+        handler,
+        respect_handler_level=True,
+    )
+    queue_handler.listener = listener
+    listener.start()
+    # Дописать очередь при обычном завершении процесса.
+    atexit.register(queue_handler.close)
+
+    logger.addHandler(queue_handler)
+    return queue_handler
@@ -0,0 +1,33 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+
+class MemoryBudget:
+    """
+    Семафор по оценке памяти: одновременно декодируемые изображения в
+    сумме не превышают total байт.
+
+    Задача больше всего бюджета ждёт, пока воркер не освободится целиком,
+    и выполняется одна.
+    """
+
+    def __init__(self, total: int) -> None:
+        self.total = total
+        self.used = 0
+        self._condition = asyncio.Condition()
+
+    @asynccontextmanager
+    async def reserve(self, amount: int) -> AsyncIterator[None]:
+        amount = min(amount, self.total)
+        async with self._condition:
+            await self._condition.wait_for(
+                lambda: self.used + amount <= self.total
+            )
+            self.used += amount
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self.used -= amount
+                self._condition.notify_all()
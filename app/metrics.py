@@ -0,0 +1,84 @@
+"""
+Метрики Prometheus для API, продюсера и воркера.
+
+API отдаёт их на /metrics, воркер — на отдельном порту
+(WORKER_METRICS_PORT).
+"""
+from prometheus_client import Counter, Gauge, Histogram
+
+# Секунды; воркерные стадии и ожидание в очереди бывают сильно дольше
+# HTTP-запросов.
+SLOW_BUCKETS = (
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600,
+)
+
+# API
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ["method", "route", "status"],
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the SQLAlchemy pool.",
+)
+DB_POOL_SIZE = Gauge(
+    "db_pool_size",
+    "Configured pool size (POOL_SIZE).",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out of the pool.",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Connections currently open above POOL_SIZE (up to MAX_OVERFLOW).",
+)
+ADMISSION_REJECTED = Counter(
+    "admission_rejected_total",
+    "Uploads rejected by admission control.",
+    ["reason"],
+)
+REPLICA_READ_FALLBACK = Counter(
+    "replica_read_fallback_total",
+    "Reads repeated on the primary because the replica lagged.",
+)
+JOB_QUEUE_DEPTH = Gauge(
+    "job_queue_depth",
+    "Jobs waiting in the thumbnail queue, as last seen by the API.",
+)
+
+# Producer
+QUEUE_PUBLISH_DURATION = Histogram(
+    "queue_publish_duration_seconds",
+    "Latency of publishing a job message.",
+    ["queue"],
+)
+
+# Worker
+THUMBNAIL_STAGE_DURATION = Histogram(
+    "thumbnail_stage_duration_seconds",
+    "Time spent per thumbnail stage (decode, resize, save).",
+    ["stage", "resolution"],
+    buckets=SLOW_BUCKETS,
+)
+WORKER_QUEUE_WAIT = Histogram(
+    "worker_queue_wait_seconds",
+    "Time from publishing a job to the worker starting it.",
+    ["lane"],
+    buckets=SLOW_BUCKETS,
+)
+WORKER_JOBS_IN_FLIGHT = Gauge(
+    "worker_jobs_in_flight",
+    "Jobs currently being processed.",
+    ["lane"],
+)
+WORKER_JOBS = Counter(
+    "worker_jobs_total",
+    "Finished jobs by resulting image status.",
+    ["lane", "status"],
+)
+WORKER_SLOW_LANE_ROUTED = Counter(
+    "worker_slow_lane_routed_total",
+    "Jobs republished to the slow lane because of their memory estimate.",
+)
@@ -0,0 +1,66 @@
+import logging
+import time
+from typing import Awaitable, Callable
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+
+from app.admission import (ADMISSION_ROUTES, client_key,
+                           get_admission_controller)
+from app.metrics import ADMISSION_REJECTED, HTTP_REQUEST_DURATION
+from app.tracing import span, trace_context
+
+logger = logging.getLogger(__name__)
+
+
+async def metrics_middleware(
+        request: Request,
+        call_next: Callable[[Request], Awaitable[Response]],
+) -> Response:
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Шаблон пути (/image/{id}/{resolution}), а не сам путь — иначе
+        # каждая картинка станет отдельной серией.
+        route = request.scope.get("route")
+        HTTP_REQUEST_DURATION.labels(
+            request.method,
+            getattr(route, "path", "unmatched"),
+            str(status),
+        ).observe(time.perf_counter() - start)
+
+
+async def trace_middleware(
+        request: Request,
+        call_next: Callable[[Request], Awaitable[Response]],
+) -> Response:
+    traceparent = request.headers.get("traceparent")
+    with trace_context(traceparent) as trace_id:
+        with span("http.request", method=request.method, path=request.url.path):
+            response = await call_next(request)
+        response.headers["X-Trace-Id"] = trace_id
+        return response
+
+
+async def admission_middleware(
+        request: Request,
+        call_next: Callable[[Request], Awaitable[Response]],
+) -> Response:
+    # Middleware, а не зависимость: зависимости FastAPI выполняются после
+    # разбора multipart, а отказывать нужно до чтения тела.
+    if (request.method, request.url.path) not in ADMISSION_ROUTES:
+        return await call_next(request)
+    rejection = get_admission_controller().check(client_key(request))
+    if rejection:
+        ADMISSION_REJECTED.labels(rejection.reason).inc()
+        logger.info(f"Upload rejected: {rejection.reason}")
+        return JSONResponse(
+            status_code=rejection.status_code,
+            content={"detail": rejection.detail},
+            headers={"Retry-After": str(rejection.retry_after)},
+        )
+    return await call_next(request)
@@ -2,11 +2,14 @@ from datetime import datetime
 from enum import Enum as PyEnum
 from uuid import UUID, uuid4
 
-from sqlalchemy import TIMESTAMP, Enum, String
+from sqlalchemy import (TIMESTAMP, BigInteger, Enum, Index, Integer,
+                        SmallInteger, String)
 from sqlalchemy.dialects.postgresql import UUID as AlchemyUUID
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 from sqlalchemy.sql import func
 
+from app.ids import uuid7
+
 
 class ImageStatus(PyEnum):
     NEW = "NEW"
@@ -22,10 +25,12 @@ class Base(DeclarativeBase):
 class Image(Base):
     __tablename__ = "images"
 
+    # UUIDv7: вставки идут в конец индекса, а время в id даёт отсечение
+    # секций при поиске по id (см. image_id_filter).
     id: Mapped[UUID] = mapped_column(
                 AlchemyUUID(as_uuid=True),
                 primary_key=True,
-                default=uuid4,
+                default=uuid7,
     )
     status: Mapped[ImageStatus] = mapped_column(
         Enum(ImageStatus, name="image_status"),
@@ -33,8 +38,21 @@ class Image(Base):
     )
     original_filename: Mapped[str] = mapped_column(String(255))
     content_type: Mapped[str] = mapped_column(String(100))
+    width: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    height: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    format: Mapped[str | None] = mapped_column(String(16), nullable=True)
+    orientation: Mapped[int | None] = mapped_column(
+        SmallInteger,
+        nullable=True,
+    )
+    size_bytes: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    # BlurHash для мгновенной заглушки на клиенте
+    placeholder: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    # Ключ секционирования (images_pYYYYMM), поэтому входит в первичный
+    # ключ; значение ставит БД.
     created_at: Mapped[datetime] = mapped_column(
         TIMESTAMP(timezone=False),
+        primary_key=True,
         server_default=func.now(),
     )
     updated_at: Mapped[datetime] = mapped_column(
@@ -42,3 +60,46 @@ class Image(Base):
         server_default=func.now(),
         onupdate=func.current_timestamp(),
     )
+
+    __table_args__ = (
+        # Частичный индекс для reaper: ищет зависшие NEW/PROCESSING
+        # по updated_at, не сканируя всю таблицу.
+        Index(
+            "ix_images_stale_updated_at",
+            "updated_at",
+            postgresql_where=status.in_(
+                [ImageStatus.NEW, ImageStatus.PROCESSING]
+            ),
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+
+class UploadSession(Base):
+    """Возобновляемая загрузка: части пишутся в {id}.part в PATH_TO_IMAGE."""
+
+    __tablename__ = "upload_sessions"
+
+    id: Mapped[UUID] = mapped_column(
+                AlchemyUUID(as_uuid=True),
+                primary_key=True,
+                default=uuid4,
+    )
+    original_filename: Mapped[str] = mapped_column(String(255))
+    content_type: Mapped[str] = mapped_column(String(100))
+    size_bytes: Mapped[int] = mapped_column(BigInteger)
+    offset: Mapped[int] = mapped_column(BigInteger, default=0)
+    # Заполняется при завершении. Без внешнего ключа: сессии живут до
+    # expires_at и удаляются reaper-ом независимо от изображений.
+    image_id: Mapped[UUID | None] = mapped_column(
+        AlchemyUUID(as_uuid=True),
+        nullable=True,
+    )
+    expires_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=False),
+        index=True,
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=False),
+        server_default=func.now(),
+    )
@@ -1,9 +1,13 @@
 import json
 import logging
+import time
+from datetime import datetime, timezone
 
 import aio_pika
 
+from app.metrics import QUEUE_PUBLISH_DURATION
 from app.settings import settings
+from app.tracing import current_traceparent, span
 
 logger = logging.getLogger(__name__)
 
@@ -28,12 +32,34 @@ class RabbitMQProducer:
             raise RuntimeError("Producer not connected")
 
         body = json.dumps(message).encode()
-        await self.channel.default_exchange.publish(
-            aio_pika.Message(body=body),
-            routing_key=self.queue_name,
-        )
+        with span("queue.publish", queue=self.queue_name), \
+                QUEUE_PUBLISH_DURATION.labels(self.queue_name).time():
+            published_at = time.time()
+            # AMQP timestamp хранит целые секунды, для метрики ожидания
+            # в очереди нужна точность выше.
+            headers: dict = {"x-published-at": published_at}
+            traceparent = current_traceparent()
+            if traceparent:
+                headers["traceparent"] = traceparent
+            await self.channel.default_exchange.publish(
+                aio_pika.Message(
+                    body=body,
+                    timestamp=datetime.fromtimestamp(
+                        published_at, tz=timezone.utc
+                    ),
+                    headers=headers,
+                ),
+                routing_key=self.queue_name,
+            )
         logger.info(f" [x] Sent {message}")
 
+    async def queue_depth(self) -> int:
+        """Число готовых к выдаче сообщений (passive declare)."""
+        if not self.channel:
+            raise RuntimeError("Producer not connected")
+        queue = await self.channel.declare_queue(self.queue_name, passive=True)
+        return queue.declaration_result.message_count or 0
+
     async def close(self):
         if self.connection:
             await self.connection.close()
@@ -1,9 +1,79 @@
-from sqlalchemy import select
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from sqlalchemy import ColumnElement, and_, func, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.exceptions import ImageNotFound
-from app.models import Image
-from app.schemas.image_schemas import ImageSchema
+from app.ids import created_at_window
+from app.models import Image, ImageStatus
+from app.schemas.image_schemas import ImageMetadata, ImageSchema
+
+
+def new_image(
+        content_type: str,
+        original_filename: str | None,
+        metadata: ImageMetadata | None = None,
+) -> Image:
+    img = Image(
+        original_filename=original_filename,
+        content_type=content_type,
+    )
+    if metadata:
+        img.width = metadata.width
+        img.height = metadata.height
+        img.format = metadata.format
+        img.orientation = metadata.orientation
+        img.size_bytes = metadata.size_bytes
+    return img
+
+
+def _created_at_window(
+        id: str | UUID,
+) -> tuple[datetime, datetime] | None:
+    try:
+        return created_at_window(UUID(str(id)))
+    except ValueError:
+        return None
+
+
+def image_id_filter(id: str | UUID) -> ColumnElement[bool]:
+    """
+    Условие поиска по id. Для UUIDv7 добавляет окно по created_at, и
+    Postgres смотрит одну-две секции images вместо индексов всех.
+    """
+    window = _created_at_window(id)
+    if window is None:
+        return Image.id == id
+    return and_(Image.id == id, Image.created_at.between(*window))
+
+
+def image_ids_filter(ids: list[UUID]) -> ColumnElement[bool]:
+    """
+    То же для пачки: UUIDv7 ищутся в окне от самого раннего до самого
+    позднего created_at, остальные id — простым IN по всем секциям.
+    """
+    v7_ids, other_ids = [], []
+    windows = []
+    for id in ids:
+        window = _created_at_window(id)
+        if window is None:
+            other_ids.append(id)
+        else:
+            v7_ids.append(id)
+            windows.append(window)
+    conditions = []
+    if v7_ids:
+        conditions.append(and_(
+            Image.id.in_(v7_ids),
+            Image.created_at.between(
+                min(low for low, _ in windows),
+                max(high for _, high in windows),
+            ),
+        ))
+    if other_ids or not conditions:
+        conditions.append(Image.id.in_(other_ids))
+    return or_(*conditions)
 
 
 class ImageRepository:
@@ -14,11 +84,9 @@ class ImageRepository:
             self,
             content_type: str,
             original_filename: str | None,
+            metadata: ImageMetadata | None = None,
     ) -> ImageSchema:
-        img = Image(
-            original_filename=original_filename,
-            content_type=content_type,
-        )
+        img = new_image(content_type, original_filename, metadata)
         self.session.add(img)
         await self.session.commit()
         await self.session.refresh(img)
@@ -26,10 +94,70 @@ class ImageRepository:
         return image_schema
 
     async def get_image_by_id(self, id: str) -> ImageSchema:
-        stmt = select(Image).where(Image.id == id)
+        stmt = select(Image).where(image_id_filter(id))
         result = await self.session.execute(stmt)
         img = result.scalar_one_or_none()
         if not img:
             raise ImageNotFound
         image_schema = ImageSchema.model_validate(img)
         return image_schema
+
+    async def get_images_by_ids(self, ids: list[UUID]) -> list[ImageSchema]:
+        stmt = select(Image).where(image_ids_filter(ids))
+        result = await self.session.execute(stmt)
+        return [ImageSchema.model_validate(img) for img in result.scalars()]
+
+    async def claim_stale_images(
+            self,
+            stale_after: timedelta,
+            limit: int,
+    ) -> list[UUID]:
+        """
+        Забирает в аренду пачку зависших NEW/PROCESSING изображений.
+
+        Строки блокируются через FOR UPDATE SKIP LOCKED, поэтому несколько
+        reaper-ов не получат одни и те же id. Аренда — это сдвиг updated_at
+        на now(): до истечения REAPER_STALE_AFTER строка снова не считается
+        зависшей.
+        """
+        stale = (
+            select(Image.id)
+            .where(
+                Image.status.in_([ImageStatus.NEW, ImageStatus.PROCESSING]),
+                Image.updated_at < func.now() - stale_after,
+            )
+            .order_by(Image.updated_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(Image)
+            .where(Image.id.in_(stale.scalar_subquery()))
+            .values(status=ImageStatus.NEW, updated_at=func.now())
+            .returning(Image.id)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(stmt)
+        ids = list(result.scalars().all())
+        await self.session.commit()
+        return ids
+
+    async def renew_lease(self, id: str, status: ImageStatus) -> None:
+        """
+        Та же аренда, что в claim_stale_images: updated_at = now(), пока
+        строка в status. Ещё REAPER_STALE_AFTER reaper её не тронет.
+        """
+        stmt = (
+            update(Image)
+            .where(image_id_filter(id), Image.status == status)
+            .values(updated_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        await self.session.execute(stmt)
+        await self.session.commit()
+
+    async def existing_ids(self, ids: list[UUID]) -> set[UUID]:
+        """Какие из ids есть в images — одним запросом на пачку."""
+        stmt = select(Image.id).where(image_ids_filter(ids))
+        result = await self.session.execute(stmt)
+        return set(result.scalars().all())
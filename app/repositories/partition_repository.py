@@ -0,0 +1,113 @@
+import re
+from pathlib import Path
+from uuid import UUID
+
+from sqlalchemy import column, select, table, text
+from sqlalchemy.dialects.postgresql import UUID as AlchemyUUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Секции называются images_pYYYYMM (см. images_create_partitions).
+PARTITION_NAME = re.compile(r"^images_p\d{6}$")
+
+
+def check_partition_name(name: str) -> str:
+    # Имя подставляется в DDL, где параметры не работают.
+    if not PARTITION_NAME.match(name):
+        raise ValueError(f"Not an images partition: {name!r}")
+    return name
+
+
+class PartitionRepository:
+    """
+    Секции таблицы images. Для detach/export/drop сессия должна быть
+    привязана к соединению в AUTOCOMMIT: DETACH CONCURRENTLY не работает
+    внутри транзакции.
+    """
+
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def create_partitions(self, months_ahead: int) -> int:
+        """Создаёт недостающие секции с текущего месяца по +months_ahead."""
+        # API, воркеры и reaper вызывают это одновременно при старте:
+        # без блокировки двое создают одну секцию, и второй падает.
+        await self.session.execute(
+            text("SELECT pg_advisory_xact_lock(hashtext('images_partitions'))")
+        )
+        stmt = text(
+            "SELECT images_create_partitions(now()::date, "
+            "(now() + make_interval(months => :months))::date)"
+        )
+        result = await self.session.execute(stmt, {"months": months_ahead})
+        created = result.scalar_one()
+        await self.session.commit()
+        return created
+
+    async def archivable_partitions(self, keep_months: int) -> list[str]:
+        """
+        Секции старше keep_months полных месяцев, включая уже
+        отсоединённые прошлым, не доведённым до конца запуском.
+        """
+        stmt = text(
+            "SELECT c.relname FROM pg_class c "
+            "JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE n.nspname = current_schema() AND c.relkind = 'r' "
+            "AND c.relname ~ '^images_p[0-9]{6}$' "
+            "AND to_date(substr(c.relname, 9), 'YYYYMM') < "
+            "date_trunc('month', now()) - make_interval(months => :months) "
+            "ORDER BY c.relname"
+        )
+        result = await self.session.execute(stmt, {"months": keep_months})
+        return list(result.scalars().all())
+
+    async def detach_partition(self, name: str) -> None:
+        check_partition_name(name)
+        stmt = text(
+            "SELECT inhdetachpending FROM pg_inherits "
+            "WHERE inhrelid = to_regclass(:name) "
+            "AND inhparent = 'images'::regclass"
+        )
+        result = await self.session.execute(stmt, {"name": name})
+        pending = result.scalar_one_or_none()
+        if pending is None:
+            return
+        # Прерванный DETACH CONCURRENTLY оставляет секцию в состоянии
+        # pending, его нужно доделать через FINALIZE.
+        mode = "FINALIZE" if pending else "CONCURRENTLY"
+        await self.session.execute(
+            text(f"ALTER TABLE images DETACH PARTITION {name} {mode}")
+        )
+
+    async def partition_ids(
+            self,
+            name: str,
+            after: UUID | None,
+            limit: int,
+    ) -> list[UUID]:
+        partition = table(
+            check_partition_name(name),
+            column("id", AlchemyUUID(as_uuid=True)),
+        )
+        stmt = select(partition.c.id).order_by(partition.c.id).limit(limit)
+        if after is not None:
+            stmt = stmt.where(partition.c.id > after)
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def export_partition(self, name: str, path: Path) -> None:
+        """COPY секции в CSV на стороне клиента."""
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+        # asyncpg.Connection: COPY через SQLAlchemy недоступен.
+        driver_connection = raw_connection.driver_connection
+        assert driver_connection is not None
+        await driver_connection.copy_from_table(
+            check_partition_name(name),
+            output=str(path),
+            format="csv",
+            header=True,
+        )
+
+    async def drop_partition(self, name: str) -> None:
+        check_partition_name(name)
+        await self.session.execute(text(f"DROP TABLE IF EXISTS {name}"))
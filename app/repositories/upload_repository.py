@@ -0,0 +1,129 @@
+from datetime import timedelta
+from uuid import UUID
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.exceptions import UploadInProgress, UploadNotFound
+from app.models import UploadSession
+from app.repositories.image_repository import new_image
+from app.schemas.image_schemas import ImageMetadata, ImageSchema
+from app.schemas.upload_schemas import UploadCreateSchema, UploadSessionSchema
+
+
+class UploadRepository:
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def create_upload(
+            self,
+            data: UploadCreateSchema,
+            ttl: timedelta,
+    ) -> UploadSessionSchema:
+        upload = UploadSession(
+            original_filename=data.filename,
+            content_type=data.content_type,
+            size_bytes=data.size,
+            offset=0,
+            # Часы БД, как и у reaper, который будет сравнивать с now().
+            expires_at=func.now() + ttl,
+        )
+        self.session.add(upload)
+        await self.session.commit()
+        await self.session.refresh(upload)
+        return UploadSessionSchema.model_validate(upload)
+
+    async def get_upload(self, id: UUID) -> UploadSessionSchema:
+        stmt = select(UploadSession).where(
+            UploadSession.id == id,
+            UploadSession.expires_at > func.now(),
+        )
+        result = await self.session.execute(stmt)
+        upload = result.scalar_one_or_none()
+        if not upload:
+            raise UploadNotFound
+        return UploadSessionSchema.model_validate(upload)
+
+    async def advance_offset(
+            self,
+            upload: UploadSessionSchema,
+            new_offset: int,
+            ttl: timedelta,
+    ) -> UploadSessionSchema:
+        """Сдвигает offset, только если его не сдвинули параллельно."""
+        stmt = (
+            update(UploadSession)
+            .where(
+                UploadSession.id == upload.id,
+                UploadSession.offset == upload.offset,
+            )
+            .values(offset=new_offset, expires_at=func.now() + ttl)
+            .returning(UploadSession.expires_at)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(stmt)
+        expires_at = result.scalar_one_or_none()
+        await self.session.commit()
+        if expires_at is None:
+            raise UploadInProgress
+        return upload.model_copy(
+            update={"offset": new_offset, "expires_at": expires_at}
+        )
+
+    async def finalize(
+            self,
+            upload: UploadSessionSchema,
+            metadata: ImageMetadata,
+    ) -> ImageSchema:
+        """
+        Создаёт изображение и привязывает его к сессии одной транзакцией:
+        повторный finalize вернёт то же изображение.
+        """
+        img = new_image(
+            upload.content_type,
+            upload.original_filename,
+            metadata,
+        )
+        self.session.add(img)
+        await self.session.flush()
+        stmt = (
+            update(UploadSession)
+            .where(
+                UploadSession.id == upload.id,
+                UploadSession.image_id.is_(None),
+            )
+            .values(image_id=img.id)
+            .returning(UploadSession.id)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(stmt)
+        if result.scalar_one_or_none() is None:
+            # Параллельный finalize успел первым.
+            await self.session.rollback()
+            raise UploadInProgress
+        await self.session.commit()
+        await self.session.refresh(img)
+        return ImageSchema.model_validate(img)
+
+    async def existing_ids(self, ids: list[UUID]) -> set[UUID]:
+        stmt = select(UploadSession.id).where(UploadSession.id.in_(ids))
+        result = await self.session.execute(stmt)
+        return set(result.scalars().all())
+
+    async def delete_expired(self, limit: int) -> list[UUID]:
+        expired = (
+            select(UploadSession.id)
+            .where(UploadSession.expires_at < func.now())
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            delete(UploadSession)
+            .where(UploadSession.id.in_(expired.scalar_subquery()))
+            .returning(UploadSession.id)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(stmt)
+        ids = list(result.scalars().all())
+        await self.session.commit()
+        return ids
@@ -1,14 +1,19 @@
 import logging
 from typing import Annotated
+from uuid import uuid4
 
 from fastapi import APIRouter, Depends, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_async_db_session
+from app.bulk_download import multipart_stream, zip_stream
+from app.database import get_async_db_session, get_async_read_session
 from app.exceptions import (FileTooBig, ImageNotFound,
                             ImageNotProcessedYetError, ImageSaveWithError,
+                            ImageTooManyPixels, InvalidImage,
                             NotAllowedContentType)
-from app.rabbit_producer import RabbitMQProducer, get_rabbit_producer
+from app.job_queue import JobQueue, get_job_queue
+from app.schemas.image_schemas import BulkDownloadSchema
 from app.services.image_service import ImageService
 from app.settings import settings
 
@@ -20,7 +25,7 @@ image_router = APIRouter()
 async def upload_image(
     image: UploadFile,
     session: Annotated[AsyncSession, Depends(get_async_db_session)],
-    producer: Annotated[RabbitMQProducer, Depends(get_rabbit_producer)]
+    producer: Annotated[JobQueue, Depends(get_job_queue)]
 ):
     try:
         image_service = ImageService(session)
@@ -40,13 +45,25 @@ async def upload_image(
             status_code=413,
             detail="Файл слишком большой."
         )
+    except ImageTooManyPixels as e:
+        logger.error("Too many pixels in image.", exc_info=e)
+        raise HTTPException(
+            status_code=413,
+            detail="Слишком большое разрешение изображения."
+        )
+    except InvalidImage as e:
+        logger.error("Invalid image file.", exc_info=e)
+        raise HTTPException(
+            status_code=422,
+            detail="Не удалось прочитать изображение."
+        )
     return image_schema
 
 
 @image_router.get("/image_info/{id}")
 async def get_images_info(
     id: str,
-    session: Annotated[AsyncSession, Depends(get_async_db_session)]
+    session: Annotated[AsyncSession, Depends(get_async_read_session)]
 ):
     try:
         image_service = ImageService(session)
@@ -64,7 +81,7 @@ async def get_images_info(
 async def get_image(
     id: str,
     resolution: int,
-    session: Annotated[AsyncSession, Depends(get_async_db_session)]
+    session: Annotated[AsyncSession, Depends(get_async_read_session)]
 ):
     try:
         if resolution not in settings.THUMBNAILS_RESOLUTION:
@@ -96,3 +113,71 @@ async def get_image(
             detail="Thumbnail generation not ready yet.",
         )
     return image
+
+
+@image_router.post("/image/bulk")
+async def get_images_bulk(
+    data: BulkDownloadSchema,
+    session: Annotated[AsyncSession, Depends(get_async_read_session)]
+):
+    if data.resolution not in settings.THUMBNAILS_RESOLUTION:
+        raise HTTPException(
+            status_code=400,
+            detail="Bad request.",
+        )
+    if len(data.ids) > settings.BULK_DOWNLOAD_MAX_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                "Слишком много изображений, максимум "
+                f"{settings.BULK_DOWNLOAD_MAX_IDS}."
+            ),
+        )
+    try:
+        image_service = ImageService(session)
+        files = await image_service.get_thumbnails(data.ids, data.resolution)
+    except ImageNotFound as e:
+        logger.error("Images not found.", exc_info=e)
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "message": "Image not found.",
+                "ids": [str(id) for id in e.args[0]],
+            },
+        )
+    except ImageSaveWithError as e:
+        logger.error("Images not saved correctly.", exc_info=e)
+        raise HTTPException(
+            status_code=424,
+            detail={
+                "message": "Thumbnail generation failed.",
+                "ids": [str(id) for id in e.args[0]],
+            },
+        )
+    except ImageNotProcessedYetError as e:
+        logger.error("Images not ready yet.", exc_info=e)
+        raise HTTPException(
+            status_code=425,
+            detail={
+                "message": "Thumbnail generation not ready yet.",
+                "ids": [str(id) for id in e.args[0]],
+            },
+        )
+    # Соединение с БД больше не нужно, а ответ может идти долго.
+    await session.close()
+
+    if data.format == "multipart":
+        boundary = uuid4().hex
+        return StreamingResponse(
+            multipart_stream(files, boundary, "image/jpeg"),
+            media_type=f"multipart/mixed; boundary={boundary}",
+        )
+    return StreamingResponse(
+        zip_stream(files),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="thumbnails_{data.resolution}.zip"'
+            ),
+        },
+    )
@@ -0,0 +1,163 @@
+import logging
+from typing import Annotated
+from uuid import UUID
+
+from fastapi import (APIRouter, Depends, Header, HTTPException, Request,
+                     Response)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_async_db_session
+from app.exceptions import (FileTooBig, ImageTooManyPixels, InvalidImage,
+                            NotAllowedContentType, UploadIncomplete,
+                            UploadInProgress, UploadNotFound,
+                            UploadOffsetMismatch)
+from app.job_queue import JobQueue, get_job_queue
+from app.schemas.upload_schemas import UploadCreateSchema
+from app.services.upload_service import UploadService
+
+logger = logging.getLogger(__name__)
+upload_router = APIRouter(prefix="/uploads", tags=["uploads"])
+
+CHUNK_CONTENT_TYPE = "application/offset+octet-stream"
+
+
+def upload_headers(offset: int, size: int) -> dict[str, str]:
+    return {
+        "Upload-Offset": str(offset),
+        "Upload-Length": str(size),
+        "Cache-Control": "no-store",
+    }
+
+
+@upload_router.post("", status_code=201)
+async def create_upload(
+    data: UploadCreateSchema,
+    response: Response,
+    session: Annotated[AsyncSession, Depends(get_async_db_session)],
+):
+    try:
+        upload_service = UploadService(session)
+        upload = await upload_service.create_upload(data)
+    except NotAllowedContentType as e:
+        logger.error("Not Allowed Content type.", exc_info=e)
+        raise HTTPException(
+            status_code=415,
+            detail="Неподдерживаемый тип файла."
+        )
+    except FileTooBig as e:
+        logger.error("Too big image to upload.", exc_info=e)
+        raise HTTPException(
+            status_code=413,
+            detail="Файл слишком большой."
+        )
+    response.headers["Location"] = f"/uploads/{upload.id}"
+    return upload
+
+
+@upload_router.head("/{id}")
+async def get_upload_offset(
+    id: UUID,
+    session: Annotated[AsyncSession, Depends(get_async_db_session)],
+):
+    try:
+        upload_service = UploadService(session)
+        upload = await upload_service.get_upload(id)
+    except UploadNotFound:
+        raise HTTPException(status_code=404)
+    return Response(headers=upload_headers(upload.offset, upload.size_bytes))
+
+
+@upload_router.patch("/{id}", status_code=204)
+async def append_chunk(
+    id: UUID,
+    request: Request,
+    session: Annotated[AsyncSession, Depends(get_async_db_session)],
+    upload_offset: Annotated[int, Header(ge=0)],
+    content_type: Annotated[str, Header()],
+):
+    if content_type != CHUNK_CONTENT_TYPE:
+        raise HTTPException(
+            status_code=415,
+            detail=f"Ожидается Content-Type: {CHUNK_CONTENT_TYPE}.",
+        )
+    try:
+        upload_service = UploadService(session)
+        upload = await upload_service.append_chunk(
+            id,
+            upload_offset,
+            request.stream(),
+        )
+    except UploadNotFound as e:
+        logger.error("Upload not found.", exc_info=e)
+        raise HTTPException(
+            status_code=404,
+            detail="Upload not found.",
+        )
+    except UploadOffsetMismatch as e:
+        raise HTTPException(
+            status_code=409,
+            detail="Upload-Offset не совпадает с сохранённым.",
+            headers={"Upload-Offset": str(e.offset)},
+        )
+    except UploadInProgress as e:
+        logger.error("Concurrent upload request.", exc_info=e)
+        raise HTTPException(
+            status_code=409,
+            detail="Загрузка уже идёт в другом запросе.",
+        )
+    except FileTooBig as e:
+        logger.error("Chunk exceeds declared size.", exc_info=e)
+        raise HTTPException(
+            status_code=413,
+            detail="Данных больше, чем заявлено при создании загрузки.",
+        )
+    return Response(
+        status_code=204,
+        headers=upload_headers(upload.offset, upload.size_bytes),
+    )
+
+
+@upload_router.post("/{id}/finalize")
+async def finalize_upload(
+    id: UUID,
+    session: Annotated[AsyncSession, Depends(get_async_db_session)],
+    producer: Annotated[JobQueue, Depends(get_job_queue)],
+):
+    try:
+        upload_service = UploadService(session)
+        image_schema, enqueue = await upload_service.finalize(id)
+        if enqueue:
+            await producer.send_message({
+                "image_id": str(image_schema.id),
+            })
+    except UploadNotFound as e:
+        logger.error("Upload not found.", exc_info=e)
+        raise HTTPException(
+            status_code=404,
+            detail="Upload not found.",
+        )
+    except UploadIncomplete as e:
+        logger.error("Upload is not complete.", exc_info=e)
+        raise HTTPException(
+            status_code=409,
+            detail="Загрузка ещё не завершена.",
+        )
+    except UploadInProgress as e:
+        logger.error("Concurrent finalize request.", exc_info=e)
+        raise HTTPException(
+            status_code=409,
+            detail="Загрузка уже завершается в другом запросе.",
+        )
+    except ImageTooManyPixels as e:
+        logger.error("Too many pixels in image.", exc_info=e)
+        raise HTTPException(
+            status_code=413,
+            detail="Слишком большое разрешение изображения."
+        )
+    except InvalidImage as e:
+        logger.error("Invalid image file.", exc_info=e)
+        raise HTTPException(
+            status_code=422,
+            detail="Не удалось прочитать изображение."
+        )
+    return image_schema
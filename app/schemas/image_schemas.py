@@ -1,7 +1,8 @@
 from datetime import datetime
+from typing import Literal
 from uuid import UUID
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 from app.models import ImageStatus
 
@@ -14,3 +15,25 @@ class ImageSchema(BaseModel):
     original_filename: str
     content_type: str
     created_at: datetime
+    width: int | None = None
+    height: int | None = None
+    format: str | None = None
+    orientation: int | None = None
+    size_bytes: int | None = None
+    placeholder: str | None = None
+
+
+class ImageMetadata(BaseModel):
+    """Сведения из заголовка файла, полученные без декодирования пикселей."""
+
+    width: int
+    height: int
+    format: str
+    orientation: int
+    size_bytes: int
+
+
+class BulkDownloadSchema(BaseModel):
+    ids: list[UUID] = Field(min_length=1)
+    resolution: int
+    format: Literal["zip", "multipart"] = "zip"
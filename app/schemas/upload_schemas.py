@@ -0,0 +1,22 @@
+from datetime import datetime
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class UploadCreateSchema(BaseModel):
+    filename: str = Field(max_length=255)
+    content_type: str
+    size: int = Field(gt=0)
+
+
+class UploadSessionSchema(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    original_filename: str
+    content_type: str
+    size_bytes: int
+    offset: int
+    expires_at: datetime
+    image_id: UUID | None = None
@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import shutil
+from pathlib import Path
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.repositories.partition_repository import PartitionRepository
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+def move_image_files(
+        image_ids: list[UUID],
+        source: Path,
+        target: Path,
+        resolutions: list[int],
+) -> int:
+    """Переносит оригиналы и миниатюры; отсутствующие файлы пропускает."""
+    moved = 0
+    for image_id in image_ids:
+        names = [str(image_id)]
+        names += [f"{image_id}_{resolution}.jpg" for resolution in resolutions]
+        for name in names:
+            try:
+                # Между томами — копирование и удаление исходника.
+                shutil.move(source / name, target / name)
+                moved += 1
+            except FileNotFoundError:
+                pass
+    return moved
+
+
+class ArchiveService:
+    """
+    Уносит секции images старше ARCHIVE_KEEP_MONTHS в ARCHIVE_PATH:
+    отсоединяет секцию, выгружает строки в CSV, переносит файлы
+    изображений и удаляет секцию. Каждый шаг можно повторить, поэтому
+    прерванный запуск просто перезапускается.
+    """
+
+    def __init__(
+            self,
+            session: AsyncSession,
+            archive_path: Path,
+            batch_size: int = 1000,
+    ) -> None:
+        self.partition_repository = PartitionRepository(session)
+        self.archive_path = archive_path
+        self.batch_size = batch_size
+        self.image_path = Path(settings.PATH_TO_IMAGE)
+        self.resolutions = settings.THUMBNAILS_RESOLUTION
+
+    async def archivable_partitions(self, keep_months: int) -> list[str]:
+        return await self.partition_repository.archivable_partitions(
+            keep_months,
+        )
+
+    async def move_files(self, name: str, target: Path) -> int:
+        moved = 0
+        last_id = None
+        while True:
+            image_ids = await self.partition_repository.partition_ids(
+                name,
+                last_id,
+                self.batch_size,
+            )
+            if not image_ids:
+                return moved
+            moved += await asyncio.to_thread(
+                move_image_files,
+                image_ids,
+                self.image_path,
+                target,
+                self.resolutions,
+            )
+            last_id = image_ids[-1]
+
+    async def archive_partition(self, name: str) -> int:
+        target = self.archive_path / name
+        target.mkdir(parents=True, exist_ok=True)
+        await self.partition_repository.detach_partition(name)
+        await self.partition_repository.export_partition(
+            name,
+            target / "images.csv",
+        )
+        moved = await self.move_files(name, target)
+        await self.partition_repository.drop_partition(name)
+        logger.info(f"Archived {name}: {moved} files moved to {target}")
+        return moved
@@ -1,24 +1,116 @@
+import asyncio
+import logging
+import time
+
 from sqlalchemy import text
-from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.exceptions import DBHealtCheckException, RabbitHealthCheckException
-from app.rabbit_producer import get_rabbit_producer
+from app.database import get_engine, pool_stats
+from app.exceptions import DBHealtCheckException, QueueHealthCheckException
+from app.job_queue import get_job_queue
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
 
 
 class HealthCheckService:
-    def __init__(self, session: AsyncSession) -> None:
-        self.session = session
+    """
+    Readiness: зависимости проверяет одна фоновая задача раз в
+    HEALTH_CHECK_INTERVAL, запрос отдаёт последний результат и не ходит
+    ни в БД, ни в брокер. Результат старше HEALTH_CHECK_TTL — тоже
+    неготовность: фоновая задача зависла или умерла.
+    """
 
-    async def check_db(self):
+    def __init__(self) -> None:
+        self.interval = settings.HEALTH_CHECK_INTERVAL
+        self.timeout = settings.HEALTH_CHECK_TIMEOUT
+        self.ttl = settings.HEALTH_CHECK_TTL
+        self.checks: dict[str, dict] = {}
+        self.checked_at: float | None = None
+        self.refresh_task: asyncio.Task | None = None
+
+    async def check_db(self) -> None:
         try:
-            async with self.session.begin():
-                await self.session.execute(text("SELECT 1"))
+            async with asyncio.timeout(self.timeout):
+                async with get_engine().connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+        except TimeoutError:
+            raise DBHealtCheckException(f"timeout after {self.timeout}s")
         except Exception as e:
             raise DBHealtCheckException(str(e))
 
-    async def check_rabbit(self):
-        producer = get_rabbit_producer()
+    async def check_queue(self) -> int:
         try:
-            producer.channel.declare_queue(producer.queue_name, passive=False)
+            async with asyncio.timeout(self.timeout):
+                return await get_job_queue().queue_depth()
+        except TimeoutError:
+            raise QueueHealthCheckException(
+                f"timeout after {self.timeout}s"
+            )
         except Exception as e:
-            raise RabbitHealthCheckException(str(e))
+            raise QueueHealthCheckException(str(e))
+
+    async def _run_check(self, name: str, check) -> dict:
+        start = time.perf_counter()
+        result: dict = {"status": "ok"}
+        try:
+            value = await check()
+            if value is not None:
+                result["depth"] = value
+        except (DBHealtCheckException, QueueHealthCheckException) as e:
+            # Пишем при переходе в ошибку, а не каждый цикл.
+            if self.checks.get(name, {}).get("status") != "error":
+                logger.error(f"{name} health check failed:", exc_info=e)
+            result = {"status": "error", "error": str(e)}
+        result["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return result
+
+    async def refresh(self) -> None:
+        db, queue = await asyncio.gather(
+            self._run_check("db", self.check_db),
+            self._run_check("queue", self.check_queue),
+        )
+        queue["backend"] = settings.QUEUE_BACKEND
+        self.checks = {"db": db, "queue": queue}
+        self.checked_at = time.monotonic()
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if not self.refresh_task:
+            self.refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self.refresh_task:
+            self.refresh_task.cancel()
+            await asyncio.gather(self.refresh_task, return_exceptions=True)
+            self.refresh_task = None
+
+    def readiness(self) -> tuple[bool, dict]:
+        """Последний результат проверок и статистика пула БД."""
+        age = None
+        if self.checked_at is not None:
+            age = round(time.monotonic() - self.checked_at, 1)
+        ready = (
+            age is not None
+            and age <= self.ttl
+            and all(c["status"] == "ok" for c in self.checks.values())
+        )
+        return ready, {
+            "status": "ready" if ready else "not_ready",
+            "checked_ago_s": age,
+            "checks": self.checks,
+            "db_pool": pool_stats(),
+        }
+
+
+health_check_service = None
+
+
+def get_health_check_service() -> HealthCheckService:
+    global health_check_service
+    if health_check_service is None:
+        health_check_service = HealthCheckService()
+    return health_check_service
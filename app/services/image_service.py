@@ -1,23 +1,43 @@
+import asyncio
 from pathlib import Path
+from uuid import UUID
 
 from aiofile import async_open
 from fastapi import UploadFile
 from fastapi.responses import FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.exceptions import (FileTooBig, ImageNotProcessedYetError,
-                            ImageSaveWithError, NotAllowedContentType)
+from app.bulk_download import DownloadFile
+from app.database import is_replica, session_gen
+from app.exceptions import (FileTooBig, ImageNotFound,
+                            ImageNotProcessedYetError, ImageSaveWithError,
+                            NotAllowedContentType)
+from app.metrics import REPLICA_READ_FALLBACK
 from app.models import ImageStatus
 from app.repositories.image_repository import ImageRepository
 from app.schemas.image_schemas import ImageSchema
 from app.settings import settings
+from app.thumbnails import probe_image
+from app.tracing import span
+
+# Статусы, после которых строка больше не меняется: реплике можно верить.
+FINAL_STATUSES = {ImageStatus.DONE, ImageStatus.ERROR}
+
+
+def file_size(path: Path) -> int | None:
+    try:
+        return path.stat().st_size
+    except FileNotFoundError:
+        return None
 
 
 class ImageService:
     def __init__(self, session: AsyncSession) -> None:
         self.allowed_content_types = settings.ALLOWED_CONTENT_TYPES
         self.max_file_size = settings.MAX_IMG_SIZE
+        self.max_pixels = settings.MAX_IMAGE_PIXELS
         self.image_repository = ImageRepository(session)
+        self.from_replica = is_replica(session)
 
     async def upload_image(self, image: UploadFile) -> ImageSchema:
         content_type = image.content_type
@@ -27,26 +47,52 @@ class ImageService:
             raise ValueError("File size is unknown")
         if image.size > self.max_file_size:
             raise FileTooBig
-        image.file.seek(0)
+        # Проверяем заголовок до записи в БД, чтобы decompression bomb
+        # не попала в очередь воркера.
+        with span("image.probe"):
+            metadata = probe_image(image.file, image.size, self.max_pixels)
 
         original_filename = image.filename
-        image_schema = await self.image_repository.add_image(
-            content_type,
-            original_filename,
-        )
+        with span("db.insert"):
+            image_schema = await self.image_repository.add_image(
+                content_type,
+                original_filename,
+                metadata,
+            )
         path_to_file = Path(settings.PATH_TO_IMAGE) / str(image_schema.id)
-        async with async_open(path_to_file, "wb") as file:
-            while chunk := image.file.read(1024 * 1024):
-                await file.write(chunk)
+        with span("file.write", image_id=image_schema.id):
+            async with async_open(path_to_file, "wb") as file:
+                while chunk := image.file.read(1024 * 1024):
+                    await file.write(chunk)
 
         return image_schema
 
+    async def get_image_by_id(self, id: str) -> ImageSchema:
+        """
+        Читает изображение; с реплики — только в финальном статусе.
+        Не найденное или ещё обрабатываемое перечитывается с primary:
+        реплика могла не догнать только что загруженное или обновлённое.
+        """
+        image = None
+        try:
+            image = await self.image_repository.get_image_by_id(id)
+        except ImageNotFound:
+            if not self.from_replica:
+                raise
+        if image is not None and (
+            not self.from_replica or image.status in FINAL_STATUSES
+        ):
+            return image
+        REPLICA_READ_FALLBACK.inc()
+        async with session_gen() as session:
+            return await ImageRepository(session).get_image_by_id(id)
+
     async def get_image_info(self, id: str) -> ImageSchema:
-        image = await self.image_repository.get_image_by_id(id)
+        image = await self.get_image_by_id(id)
         return image
 
     async def get_image(self, id: str, resolution: int) -> FileResponse:
-        image_schema = await self.image_repository.get_image_by_id(id)
+        image_schema = await self.get_image_by_id(id)
         if image_schema.status == ImageStatus.ERROR:
             raise ImageSaveWithError
         if image_schema.status == ImageStatus.PROCESSING:
@@ -54,3 +100,61 @@ class ImageService:
         file_name = str(image_schema.id) + "_" + str(resolution) + ".jpg"
         path_to_file = Path(settings.PATH_TO_IMAGE) / file_name
         return FileResponse(path_to_file)
+
+    async def get_images_by_ids(
+            self,
+            ids: list[UUID],
+    ) -> dict[UUID, ImageSchema]:
+        """Пачка изображений одним запросом; с реплики — как get_image_by_id."""
+        images = {
+            image.id: image
+            for image in await self.image_repository.get_images_by_ids(ids)
+        }
+        if self.from_replica:
+            stale = [
+                id for id in ids
+                if id not in images or images[id].status not in FINAL_STATUSES
+            ]
+            if stale:
+                REPLICA_READ_FALLBACK.inc()
+                async with session_gen() as session:
+                    repository = ImageRepository(session)
+                    for image in await repository.get_images_by_ids(stale):
+                        images[image.id] = image
+        return images
+
+    async def get_thumbnails(
+            self,
+            ids: list[UUID],
+            resolution: int,
+    ) -> list[DownloadFile]:
+        """
+        Миниатюры для скачивания одним ответом. Все проверки — до начала
+        ответа: после первого байта статус уже не поменять. Исключения
+        несут список id, из-за которых отказ.
+        """
+        ids = list(dict.fromkeys(ids))
+        images = await self.get_images_by_ids(ids)
+        missing = [id for id in ids if id not in images]
+        if missing:
+            raise ImageNotFound(missing)
+        failed = [id for id in ids if images[id].status == ImageStatus.ERROR]
+        if failed:
+            raise ImageSaveWithError(failed)
+        pending = [id for id in ids if images[id].status != ImageStatus.DONE]
+        if pending:
+            raise ImageNotProcessedYetError(pending)
+
+        base = Path(settings.PATH_TO_IMAGE)
+        names = [f"{id}_{resolution}.jpg" for id in ids]
+        sizes = await asyncio.to_thread(
+            lambda: [file_size(base / name) for name in names]
+        )
+        missing = [id for id, size in zip(ids, sizes) if size is None]
+        if missing:
+            raise ImageNotFound(missing)
+        return [
+            DownloadFile(name, base / name, size)
+            for name, size in zip(names, sizes)
+            if size is not None
+        ]
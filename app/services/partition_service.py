@@ -0,0 +1,28 @@
+import logging
+
+from app.database import session_gen
+from app.repositories.partition_repository import PartitionRepository
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+async def ensure_partitions() -> int:
+    """
+    Секции images на PARTITION_MONTHS_AHEAD месяцев вперёд при старте API
+    и воркера: reaper — отдельный сервис, и если он не работает, после
+    последней секции не пройдёт ни одна вставка.
+    """
+    try:
+        async with session_gen() as session:
+            created = await PartitionRepository(session).create_partitions(
+                settings.PARTITION_MONTHS_AHEAD,
+            )
+    except Exception as e:
+        # Секции на ближайшие месяцы обычно уже есть — не повод не
+        # стартовать.
+        logger.error("[!] Failed to create images partitions:", exc_info=e)
+        return 0
+    if created:
+        logger.info(f"Created {created} images partitions")
+    return created
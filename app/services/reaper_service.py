@@ -0,0 +1,100 @@
+import asyncio
+import logging
+from datetime import timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import session_gen
+from app.job_queue import JobQueue
+from app.repositories.image_repository import ImageRepository
+from app.repositories.partition_repository import PartitionRepository
+from app.repositories.upload_repository import UploadRepository
+from app.services.upload_service import part_path
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ReaperService:
+    """
+    Возвращает в очередь изображения, зависшие в NEW или PROCESSING.
+
+    NEW остаётся, если send_message упал после коммита, PROCESSING — если
+    воркер умер посреди обработки. Заодно удаляет просроченные
+    возобновляемые загрузки и создаёт будущие секции images.
+    """
+
+    def __init__(
+            self,
+            session: AsyncSession,
+            producer: JobQueue,
+    ) -> None:
+        self.image_repository = ImageRepository(session)
+        self.upload_repository = UploadRepository(session)
+        self.partition_repository = PartitionRepository(session)
+        self.producer = producer
+        self.stale_after = timedelta(seconds=settings.REAPER_STALE_AFTER)
+        self.batch_size = settings.REAPER_BATCH_SIZE
+
+    async def requeue_stale_batch(self) -> int:
+        image_ids = await self.image_repository.claim_stale_images(
+            self.stale_after,
+            self.batch_size,
+        )
+        for image_id in image_ids:
+            # Если публикация упадёт, аренда истечёт и строка будет
+            # подхвачена снова на следующем проходе.
+            await self.producer.send_message({"image_id": str(image_id)})
+        if image_ids:
+            logger.info(f"Requeued {len(image_ids)} stale images")
+        return len(image_ids)
+
+    async def requeue_stale(self) -> int:
+        total = 0
+        while True:
+            requeued = await self.requeue_stale_batch()
+            total += requeued
+            if requeued < self.batch_size:
+                return total
+
+    async def purge_expired_uploads(self) -> int:
+        """Удаляет просроченные сессии загрузки и их .part файлы."""
+        total = 0
+        while True:
+            upload_ids = await self.upload_repository.delete_expired(
+                self.batch_size,
+            )
+            for upload_id in upload_ids:
+                await asyncio.to_thread(
+                    part_path(upload_id).unlink,
+                    missing_ok=True,
+                )
+            total += len(upload_ids)
+            if len(upload_ids) < self.batch_size:
+                if total:
+                    logger.info(f"Purged {total} expired uploads")
+                return total
+
+    async def create_partitions(self) -> int:
+        created = await self.partition_repository.create_partitions(
+            settings.PARTITION_MONTHS_AHEAD,
+        )
+        if created:
+            logger.info(f"Created {created} images partitions")
+        return created
+
+
+async def run_reaper(producer: JobQueue) -> None:
+    """Бесконечный цикл проходов reaper с интервалом REAPER_INTERVAL."""
+    while True:
+        try:
+            async with session_gen() as session:
+                reaper_service = ReaperService(session, producer)
+                # Первым: без секции текущего месяца не пройдёт ни одна
+                # вставка в images.
+                await reaper_service.create_partitions()
+                await reaper_service.requeue_stale()
+                await reaper_service.purge_expired_uploads()
+        except Exception as e:
+            logger.error("[!] Reaper pass failed:", exc_info=e)
+        await asyncio.sleep(settings.REAPER_INTERVAL)
@@ -0,0 +1,149 @@
+import fcntl
+import os
+from datetime import timedelta
+from pathlib import Path
+from typing import AsyncIterator
+from uuid import UUID
+
+from aiofile import AIOFile
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.exceptions import (FileTooBig, NotAllowedContentType,
+                            UploadIncomplete, UploadInProgress, UploadNotFound,
+                            UploadOffsetMismatch)
+from app.repositories.image_repository import ImageRepository
+from app.repositories.upload_repository import UploadRepository
+from app.schemas.image_schemas import ImageSchema
+from app.schemas.upload_schemas import UploadCreateSchema, UploadSessionSchema
+from app.settings import settings
+from app.thumbnails import probe_image
+from app.tracing import span
+
+
+def part_path(upload_id: UUID) -> Path:
+    return Path(settings.PATH_TO_IMAGE) / f"{upload_id}.part"
+
+
+class UploadService:
+    """
+    Возобновляемая загрузка в духе tus: создать сессию, дослать части
+    PATCH-ами с Upload-Offset, завершить. Части пишутся сразу в
+    {id}.part рядом с оригиналами, при завершении файл переименовывается
+    в оригинал изображения.
+    """
+
+    def __init__(self, session: AsyncSession) -> None:
+        self.allowed_content_types = settings.ALLOWED_CONTENT_TYPES
+        self.max_file_size = settings.MAX_IMG_SIZE
+        self.max_pixels = settings.MAX_IMAGE_PIXELS
+        self.ttl = timedelta(seconds=settings.UPLOAD_SESSION_TTL)
+        self.session = session
+        self.upload_repository = UploadRepository(session)
+        self.image_repository = ImageRepository(session)
+
+    async def create_upload(
+            self,
+            data: UploadCreateSchema,
+    ) -> UploadSessionSchema:
+        if data.content_type not in self.allowed_content_types:
+            raise NotAllowedContentType
+        if data.size > self.max_file_size:
+            raise FileTooBig
+        upload = await self.upload_repository.create_upload(data, self.ttl)
+        part_path(upload.id).touch()
+        return upload
+
+    async def get_upload(self, id: UUID) -> UploadSessionSchema:
+        return await self.upload_repository.get_upload(id)
+
+    async def append_chunk(
+            self,
+            id: UUID,
+            offset: int,
+            chunks: AsyncIterator[bytes],
+    ) -> UploadSessionSchema:
+        upload = await self.upload_repository.get_upload(id)
+        # Завершаем читающую транзакцию: соединение возвращается в пул и
+        # не держится, пока клиент шлёт тело.
+        await self.session.commit()
+        if upload.image_id is not None or offset != upload.offset:
+            raise UploadOffsetMismatch(upload.offset)
+
+        written = offset
+        try:
+            file = AIOFile(part_path(upload.id), "r+b")
+            await file.open()
+        except FileNotFoundError:
+            raise UploadNotFound
+        try:
+            try:
+                fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise UploadInProgress
+            # Пока мы ждали блокировку, другой PATCH с тем же offset мог
+            # дописать и закоммитить: перечитываем строку под блокировкой,
+            # иначе truncate срежет уже принятые байты.
+            upload = await self.upload_repository.get_upload(id)
+            await self.session.commit()
+            if upload.image_id is not None or offset != upload.offset:
+                raise UploadOffsetMismatch(upload.offset)
+            # Байты после offset — хвост оборванного PATCH, который не
+            # успел попасть в БД.
+            await file.truncate(offset)
+            try:
+                async for chunk in chunks:
+                    if written + len(chunk) > upload.size_bytes:
+                        raise FileTooBig
+                    await file.write(chunk, written)
+                    written += len(chunk)
+            finally:
+                # Сохраняем то, что успело прийти, даже если клиент
+                # оборвал соединение: следующий PATCH продолжит отсюда.
+                if written > offset:
+                    await file.fdsync()
+                    upload = await self.upload_repository.advance_offset(
+                        upload,
+                        written,
+                        self.ttl,
+                    )
+        finally:
+            # Снимаем явно: io_uring-бэкенд aiofile может держать файл и
+            # после close(), и блокировка пережила бы запрос.
+            fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+            await file.close()
+        return upload
+
+    async def finalize(self, id: UUID) -> tuple[ImageSchema, bool]:
+        """
+        Превращает загрузку в изображение. Возвращает изображение и флаг,
+        нужно ли ставить задачу: повторный вызов после сбоя безопасен и
+        не ставит задачу второй раз, если всё уже сделано.
+        """
+        upload = await self.upload_repository.get_upload(id)
+        path = part_path(upload.id)
+        enqueue = False
+        if upload.image_id is None:
+            if upload.offset != upload.size_bytes:
+                raise UploadIncomplete
+            with span("image.probe"), open(path, "rb") as file:
+                metadata = probe_image(
+                    file,
+                    upload.size_bytes,
+                    self.max_pixels,
+                )
+            with span("db.insert"):
+                image = await self.upload_repository.finalize(
+                    upload,
+                    metadata,
+                )
+            enqueue = True
+        else:
+            image = await self.image_repository.get_image_by_id(
+                str(upload.image_id)
+            )
+        if path.exists():
+            # Тот же каталог — rename атомарен, воркер не увидит
+            # недописанный оригинал.
+            os.replace(path, Path(settings.PATH_TO_IMAGE) / str(image.id))
+            enqueue = True
+        return image, enqueue
@@ -0,0 +1,18 @@
+import asyncio
+import time
+
+
+class Throttle:
+    """Не больше rate вызовов wait() в секунду; None или 0 — без лимита."""
+
+    def __init__(self, rate: float | None) -> None:
+        self.interval = 1 / rate if rate else 0.0
+        self._next_at = time.monotonic()
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        now = time.monotonic()
+        if self._next_at > now:
+            await asyncio.sleep(self._next_at - now)
+        self._next_at = max(now, self._next_at) + self.interval
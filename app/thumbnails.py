@@ -0,0 +1,190 @@
+import logging
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Iterator
+from uuid import uuid4
+
+from PIL import ExifTags
+from PIL import Image as PILImage
+from PIL import UnidentifiedImageError
+
+from app import blurhash
+from app.exceptions import ImageTooManyPixels, InvalidImage
+from app.metrics import THUMBNAIL_STAGE_DURATION
+from app.schemas.image_schemas import ImageMetadata
+from app.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Режимы, которые resize() обрабатывает без потери качества. Остальные
+# (P, 1, I;16, ...) приводим к RGB до уменьшения.
+RESIZABLE_MODES = ("RGB", "RGBA", "L", "LA", "CMYK")
+# Форматы с уменьшением при декодировании через draft() (DCT scaling).
+DRAFT_FORMATS = ("JPEG", "MPO")
+# Как в Image.thumbnail(): draft() запрашивает размер с таким запасом.
+REDUCING_GAP = 2.0
+# Декодированный буфер (до 4 байт на пиксель) плюс рабочая копия при
+# resize/convert.
+PEAK_BYTES_PER_PIXEL = 8
+
+
+def probe_image(
+        file: BinaryIO,
+        size_bytes: int,
+        max_pixels: int,
+) -> ImageMetadata:
+    """
+    Читает только заголовок: PIL.Image.open ленивый, пиксели не
+    декодируются, пока не вызван load().
+    """
+    file.seek(0)
+    try:
+        with PILImage.open(file) as img:
+            width, height = img.size
+            image_format = img.format or ""
+            # getexif() у PNG вызывает load(), поэтому разбираем сырой
+            # EXIF из заголовка сами.
+            orientation = 1
+            raw_exif = img.info.get("exif")
+            if raw_exif:
+                exif = PILImage.Exif()
+                exif.load(raw_exif)
+                orientation = exif.get(ExifTags.Base.Orientation, 1)
+    except PILImage.DecompressionBombError as e:
+        raise ImageTooManyPixels(str(e))
+    except (UnidentifiedImageError, OSError, SyntaxError) as e:
+        raise InvalidImage(str(e))
+    finally:
+        file.seek(0)
+
+    if width * height > max_pixels:
+        raise ImageTooManyPixels(
+            f"{width}x{height} exceeds {max_pixels} pixels"
+        )
+    return ImageMetadata(
+        width=width,
+        height=height,
+        format=image_format,
+        orientation=orientation,
+        size_bytes=size_bytes,
+    )
+
+
+@contextmanager
+def _stage(name: str, resolution: int) -> Iterator[None]:
+    label = str(resolution)
+    with THUMBNAIL_STAGE_DURATION.labels(name, label).time(), \
+            span(f"thumbnail.{name}", resolution=resolution):
+        yield
+
+
+def save_jpeg(img: PILImage.Image, path: Path) -> None:
+    """
+    Пишет во временный файл рядом и переименовывает: миниатюра под
+    настоящим именем либо целая, либо её нет, даже если процесс убит
+    посреди записи. Брошенные *.tmp убирает orphan_gc.
+    """
+    # Своё имя на каждую запись: два воркера с одной задачей (повтор после
+    # остановки, reaper) не пишут в один временный файл.
+    tmp_path = path.with_name(f"{path.name}.{uuid4().hex}.tmp")
+    try:
+        img.save(tmp_path, "JPEG", quality=85)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def read_header(path: Path) -> tuple[int, int, str | None]:
+    with PILImage.open(path) as img:
+        return img.width, img.height, img.format
+
+
+def resize_image(
+        original_path: Path,
+        thumb_path: Path,
+        resolution: int,
+) -> None:
+
+    with PILImage.open(original_path) as img:
+        with _stage("decode", resolution):
+            # Явный draft() + load(), чтобы декодирование измерялось
+            # отдельно от resize.
+            request = int(resolution * REDUCING_GAP)
+            img.draft(None, (request, request))
+            img.load()
+        with _stage("resize", resolution):
+            thumb = _thumbnail_rgb(img, resolution)
+        with _stage("save", resolution):
+            save_jpeg(thumb, thumb_path)
+        logger.info(f"Thumbnail saved: {thumb_path}")
+
+
+def render_thumbnails(
+        original_path: Path,
+        targets: list[tuple[Path, int]],
+) -> int:
+    """
+    Декодирует оригинал один раз и сохраняет все переданные размеры.
+    Возвращает число созданных файлов.
+    """
+    if not targets:
+        return 0
+    # От большего к меньшему: каждый размер считается из предыдущего,
+    # а оригинал декодируется один раз с draft() под самый большой.
+    targets = sorted(targets, key=lambda target: target[1], reverse=True)
+    with PILImage.open(original_path) as img:
+        thumb: PILImage.Image = img
+        for thumb_path, resolution in targets:
+            thumb = _thumbnail_rgb(thumb, resolution)
+            save_jpeg(thumb, thumb_path)
+            logger.info(f"Thumbnail saved: {thumb_path}")
+    return len(targets)
+
+
+def _thumbnail_rgb(
+        img: PILImage.Image,
+        resolution: int,
+) -> PILImage.Image:
+    if img.mode not in RESIZABLE_MODES:
+        img = img.convert("RGB")
+    # Если draft() ещё не вызывали, thumbnail() сделает это сам до load():
+    # JPEG декодируется сразу в 1/2-1/8 размера, поэтому convert("RGB")
+    # делаем уже после уменьшения.
+    img.thumbnail((resolution, resolution), PILImage.Resampling.LANCZOS)
+    return img.convert("RGB")
+
+
+def estimate_decode_bytes(
+        width: int,
+        height: int,
+        image_format: str | None,
+        resolution: int,
+) -> int:
+    """
+    Оценка пиковой памяти на декодирование оригинала под resolution.
+    Повторяет выбор масштаба в JpegImageFile.draft().
+    """
+    scale = 1
+    if image_format in DRAFT_FORMATS:
+        requested = max(int(resolution * REDUCING_GAP), 1)
+        ratio = min(width // requested, height // requested)
+        # ratio == 0 у оригиналов меньше запрошенного: draft() не уменьшает.
+        scale = next((s for s in (8, 4, 2) if ratio >= s), 1)
+    decoded_pixels = (-(-width // scale)) * (-(-height // scale))
+    return decoded_pixels * PEAK_BYTES_PER_PIXEL
+
+
+def make_placeholder(thumb_path: Path, max_side: int = 32) -> str:
+    """
+    BlurHash по самой маленькой миниатюре: она уже посчитана, и её
+    декодирование почти бесплатно по сравнению с оригиналом.
+    """
+    with PILImage.open(thumb_path) as img:
+        img.draft("RGB", (max_side, max_side))
+        small = img.convert("RGB")
+    small.thumbnail((max_side, max_side), PILImage.Resampling.BILINEAR)
+    if small.width >= small.height:
+        return blurhash.encode(small, x_components=4, y_components=3)
+    return blurhash.encode(small, x_components=3, y_components=4)
@@ -0,0 +1,131 @@
+"""
+Сквозная трассировка загрузка → очередь → воркер.
+
+Контекст (trace_id, span_id) живёт в contextvars, между процессами
+передаётся заголовком W3C traceparent в HTTP и в заголовках сообщения.
+Спаны пишутся строками JSON в формате, близком к OTLP/JSON, в файл
+TRACE_EXPORT_PATH; без него спаны только дают span_id для логов.
+"""
+import json
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator
+
+from app.logging.queued import attach_queued
+
+trace_id_var: ContextVar[str | None] = ContextVar("trace_id", default=None)
+span_id_var: ContextVar[str | None] = ContextVar("span_id", default=None)
+
+span_logger = logging.getLogger("app.tracing.spans")
+span_logger.propagate = False
+
+
+def new_trace_id() -> str:
+    return f"{random.getrandbits(128):032x}"
+
+
+def new_span_id() -> str:
+    return f"{random.getrandbits(64):016x}"
+
+
+def parse_traceparent(value: str | None) -> tuple[str, str] | None:
+    """Разбирает '00-<trace_id>-<parent_id>-<flags>'."""
+    if not value:
+        return None
+    parts = value.split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    return parts[1], parts[2]
+
+
+def current_traceparent() -> str | None:
+    trace_id = trace_id_var.get()
+    if not trace_id:
+        return None
+    span_id = span_id_var.get() or new_span_id()
+    return f"00-{trace_id}-{span_id}-01"
+
+
+@contextmanager
+def trace_context(traceparent: str | None = None) -> Iterator[str]:
+    """Продолжает входящий трейс или начинает новый."""
+    parsed = parse_traceparent(traceparent)
+    trace_id, parent_id = parsed if parsed else (new_trace_id(), None)
+    trace_token = trace_id_var.set(trace_id)
+    span_token = span_id_var.set(parent_id)
+    try:
+        yield trace_id
+    finally:
+        span_id_var.reset(span_token)
+        trace_id_var.reset(trace_token)
+
+
+def export_span(
+        name: str,
+        start_ns: int,
+        end_ns: int,
+        span_id: str | None = None,
+        parent_id: str | None = None,
+        error: bool = False,
+        **attributes: Any,
+) -> None:
+    trace_id = trace_id_var.get()
+    if not trace_id or not span_logger.handlers:
+        return
+    span_logger.info(json.dumps({
+        "traceId": trace_id,
+        "spanId": span_id or new_span_id(),
+        "parentSpanId": parent_id or "",
+        "name": name,
+        "startTimeUnixNano": start_ns,
+        "endTimeUnixNano": end_ns,
+        "attributes": [
+            {"key": key, "value": {"stringValue": str(value)}}
+            for key, value in attributes.items()
+        ],
+        "status": {"code": 2 if error else 1},
+    }))
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[None]:
+    if not trace_id_var.get():
+        yield
+        return
+    parent_id = span_id_var.get()
+    span_id = new_span_id()
+    token = span_id_var.set(span_id)
+    start_ns = time.time_ns()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        span_id_var.reset(token)
+        export_span(
+            name,
+            start_ns,
+            time.time_ns(),
+            span_id=span_id,
+            parent_id=parent_id,
+            error=error,
+            **attributes,
+        )
+
+
+def setup_tracing(export_path: str | None, queue_size: int = 10000) -> None:
+    for handler in span_logger.handlers[:]:
+        span_logger.removeHandler(handler)
+        handler.close()
+    if not export_path:
+        return
+    handler = logging.FileHandler(export_path)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    # Запись в файл — в фоновом потоке, как и у основных логов.
+    attach_queued(span_logger, handler, queue_size)
+    span_logger.setLevel(logging.INFO)
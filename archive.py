@@ -0,0 +1,82 @@
+"""
+Архивация секций images старше ARCHIVE_KEEP_MONTHS месяцев: строки
+выгружаются в CSV, оригиналы и миниатюры переносятся в ARCHIVE_PATH
+(холодное хранилище), секция удаляется.
+
+    python archive.py --dry-run
+    python archive.py --keep-months 24
+"""
+import argparse
+import asyncio
+import logging
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_engine, shutdown
+from app.logging.logging import setup_logging
+from app.services.archive_service import ArchiveService
+from app.settings import settings
+
+setup_logging()
+logger = logging.getLogger("image_archive")
+
+
+async def archive(dry_run: bool, keep_months: int, archive_path: Path) -> int:
+    async with get_engine().connect() as connection:
+        # DETACH PARTITION CONCURRENTLY нельзя выполнять в транзакции.
+        connection = await connection.execution_options(
+            isolation_level="AUTOCOMMIT",
+        )
+        async with AsyncSession(bind=connection) as session:
+            archive_service = ArchiveService(session, archive_path)
+            partitions = await archive_service.archivable_partitions(
+                keep_months,
+            )
+            if dry_run:
+                for name in partitions:
+                    logger.info(f"Would archive {name}")
+                return len(partitions)
+            for name in partitions:
+                await archive_service.archive_partition(name)
+            return len(partitions)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="only list partitions that would be archived",
+    )
+    parser.add_argument(
+        "--keep-months",
+        type=int,
+        default=settings.ARCHIVE_KEEP_MONTHS,
+        help="full months to keep in the database",
+    )
+    parser.add_argument(
+        "--archive-path",
+        type=Path,
+        default=Path(settings.ARCHIVE_PATH),
+        help="cold storage directory",
+    )
+    args = parser.parse_args()
+
+    try:
+        archived = await archive(
+            args.dry_run,
+            args.keep_months,
+            args.archive_path,
+        )
+    finally:
+        await shutdown()
+
+    if args.dry_run:
+        logger.info(f"Dry run: {archived} partitions would be archived")
+    else:
+        logger.info(f"Archive done: {archived} partitions archived")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,233 @@
+"""
+Догенерация недостающих миниатюр после изменения THUMBNAILS_RESOLUTION.
+
+    python backfill.py --dry-run
+    python backfill.py --workers 4 --rate 50 --checkpoint backfill.ckpt
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from uuid import UUID
+
+from sqlalchemy import select
+
+from app.database import session_gen, shutdown
+from app.logging.logging import setup_logging
+from app.models import Image, ImageStatus
+from app.settings import settings
+from app.throttle import Throttle
+from app.thumbnails import render_thumbnails
+
+setup_logging()
+logger = logging.getLogger("image_backfill")
+
+
+def missing_renditions(
+        image_id: str,
+        resolutions: list[int],
+) -> list[tuple[Path, int]]:
+    base = Path(settings.PATH_TO_IMAGE)
+    return [
+        (base / f"{image_id}_{resolution}.jpg", resolution)
+        for resolution in resolutions
+        if not (base / f"{image_id}_{resolution}.jpg").exists()
+    ]
+
+
+class Checkpoint:
+    """
+    Хранит последний id, до которого включительно всё обработано.
+
+    Задачи завершаются не по порядку, поэтому сохраняется только
+    «водяной знак»: id, перед которым нет незавершённых задач. Упавшие
+    id записываются отдельно и водяной знак дальше первого из них не
+    сдвигают: при возобновлении они будут повторены.
+    """
+
+    def __init__(self, path: Path | None, interval: float = 5.0) -> None:
+        self.path = path
+        self.interval = interval
+        self._saved_at = time.monotonic()
+        self._pending: deque[str] = deque()
+        self._done: set[str] = set()
+        self.last_id: str | None = None
+        self.failed_ids: set[str] = set()
+        if path and path.exists():
+            text = path.read_text().strip()
+            if text.startswith("{"):
+                state = json.loads(text)
+                self.last_id = state["last_id"]
+                self.failed_ids = set(state["failed"])
+            else:
+                # Прежний формат: только id.
+                self.last_id = text or None
+
+    def started(self, image_id: str) -> None:
+        self._pending.append(image_id)
+
+    def finished(self, image_id: str) -> None:
+        self.failed_ids.discard(image_id)
+        self._done.add(image_id)
+        while self._pending and self._pending[0] in self._done:
+            self._done.discard(self._pending[0])
+            self.last_id = self._pending.popleft()
+
+    def failed(self, image_id: str) -> None:
+        # Остаётся в _pending незавершённым и держит водяной знак.
+        self.failed_ids.add(image_id)
+
+    def maybe_save(self) -> None:
+        if time.monotonic() - self._saved_at >= self.interval:
+            self.save()
+
+    def save(self) -> None:
+        self._saved_at = time.monotonic()
+        if not self.path or not (self.last_id or self.failed_ids):
+            return
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({
+            "last_id": self.last_id,
+            "failed": sorted(self.failed_ids),
+        }))
+        os.replace(tmp_path, self.path)
+
+
+async def backfill(
+        dry_run: bool,
+        workers: int,
+        rate: float | None,
+        checkpoint: Checkpoint,
+        yield_per: int = 1000,
+) -> int:
+    resolutions = settings.THUMBNAILS_RESOLUTION
+    stmt = (
+        select(Image.id)
+        .where(Image.status == ImageStatus.DONE)
+        .order_by(Image.id)
+        .execution_options(yield_per=yield_per)
+    )
+    if checkpoint.last_id:
+        stmt = stmt.where(Image.id > UUID(checkpoint.last_id))
+
+    loop = asyncio.get_running_loop()
+    throttle = Throttle(rate)
+    in_flight = asyncio.Semaphore(workers * 2)
+    tasks: set[asyncio.Task] = set()
+    created = 0
+
+    async def render(
+            executor: ProcessPoolExecutor,
+            image_id: str,
+            targets: list[tuple[Path, int]],
+    ) -> None:
+        nonlocal created
+        try:
+            original_path = Path(settings.PATH_TO_IMAGE) / image_id
+            rendered = await loop.run_in_executor(
+                executor,
+                render_thumbnails,
+                original_path,
+                targets,
+            )
+            created += rendered
+        except Exception as e:
+            logger.error(f"[!] Backfill failed for {image_id}:", exc_info=e)
+            checkpoint.failed(image_id)
+        else:
+            checkpoint.finished(image_id)
+        finally:
+            checkpoint.maybe_save()
+            in_flight.release()
+
+    # Поток QueueListener не переживает fork: дочерним процессам нужен
+    # свой.
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=setup_logging,
+    ) as executor:
+        async with session_gen() as session:
+            # stream_scalars держит серверный курсор и не грузит все id
+            # в память.
+            image_ids = await session.stream_scalars(stmt)
+            async for raw_id in image_ids:
+                image_id = str(raw_id)
+                targets = missing_renditions(image_id, resolutions)
+                if dry_run:
+                    created += len(targets)
+                    continue
+                if not targets:
+                    checkpoint.started(image_id)
+                    checkpoint.finished(image_id)
+                    continue
+
+                await in_flight.acquire()
+                await throttle.wait()
+                checkpoint.started(image_id)
+                task = asyncio.create_task(render(executor, image_id, targets))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+        if tasks:
+            await asyncio.gather(*tasks)
+    checkpoint.save()
+    return created
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="only count thumbnails that would be created",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="number of resize processes",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=None,
+        help="max images per second",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        type=Path,
+        default=None,
+        help="file to resume from and to store progress in",
+    )
+    args = parser.parse_args()
+
+    checkpoint = Checkpoint(args.checkpoint)
+    try:
+        created = await backfill(
+            args.dry_run,
+            args.workers,
+            args.rate,
+            checkpoint,
+        )
+    finally:
+        await shutdown()
+
+    if args.dry_run:
+        logger.info(f"Dry run: {created} thumbnails would be created")
+    else:
+        logger.info(f"Backfill done: {created} thumbnails created")
+    if checkpoint.failed_ids:
+        logger.warning(
+            f"{len(checkpoint.failed_ids)} images failed, first: "
+            f"{min(checkpoint.failed_ids)}; rerun with the same "
+            "--checkpoint to retry them"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,142 @@
+"""
+Прогон всех бенчмарков с записью результатов в JSON для сравнения
+между коммитами (см. benchmarks.compare).
+
+    python -m benchmarks                      # всё, профиль full
+    python -m benchmarks --profile quick --only thumbnails api
+    python -m benchmarks --output before.json
+
+По умолчанию результат пишется в benchmarks/results/<commit>.json.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from importlib.metadata import version
+from pathlib import Path
+
+from benchmarks import (bench_api, bench_ids, bench_logging, bench_pipeline,
+                        bench_thumbnails)
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+PROFILES = {
+    "quick": {
+        "repeat": 1,
+        "requests": 100,
+        "concurrency": 10,
+        "images": 10,
+        "prefetch": 4,
+        "log_calls": 10000,
+        "log_requests": 500,
+        "ids": 100_000,
+    },
+    "full": {
+        "repeat": 3,
+        "requests": 500,
+        "concurrency": 20,
+        "images": 50,
+        "prefetch": 4,
+        "log_calls": 50000,
+        "log_requests": 2000,
+        "ids": 1_000_000,
+    },
+}
+
+SUITES = ("thumbnails", "api", "pipeline", "logging", "ids")
+
+
+def git(*args: str) -> str:
+    try:
+        return subprocess.run(
+            ["git", *args], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def environment() -> dict:
+    from app.settings import settings
+
+    return {
+        "commit": git("rev-parse", "HEAD") or "unknown",
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "pillow": version("pillow"),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "thumbnails_resolution": list(settings.THUMBNAILS_RESOLUTION),
+    }
+
+
+def run_suite(name: str, params: dict, corpus_dir: Path):
+    if name == "thumbnails":
+        return bench_thumbnails.run(
+            corpus_dir, params["repeat"], resolution=1200,
+        )
+    if name == "api":
+        return bench_api.run(
+            corpus_dir, params["requests"], params["concurrency"],
+        )
+    if name == "pipeline":
+        # Без внешних сервисов: стенды и очередь внутри процесса.
+        return [
+            result
+            for backend in ("memory", "inprocess")
+            for result in bench_pipeline.run(
+                corpus_dir,
+                params["images"],
+                params["concurrency"],
+                params["prefetch"],
+                backend,
+            )
+        ]
+    if name == "ids":
+        # Вставка в Postgres — отдельно: python -m benchmarks.bench_ids
+        # --postgres.
+        return bench_ids.run(params["ids"])
+    return bench_logging.run(
+        params["log_calls"],
+        params["log_requests"],
+        params["concurrency"],
+        sink_delay=50e-6,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--profile", choices=list(PROFILES), default="full")
+    parser.add_argument("--only", nargs="+", choices=SUITES,
+                        default=list(SUITES))
+    parser.add_argument("--corpus-dir", type=Path,
+                        default=Path(".bench_corpus"))
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    params = PROFILES[args.profile]
+    meta = environment()
+    suites = {}
+    for name in args.only:
+        print(f"running {name}...", file=sys.stderr)  # noqa: T201
+        suites[name] = run_suite(name, params, args.corpus_dir)
+
+    output = args.output or RESULTS_DIR / f"{meta['commit'][:12]}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(
+        {
+            "meta": meta,
+            "profile": args.profile,
+            "params": params,
+            "suites": suites,
+        },
+        indent=2,
+    ))
+    print(output)  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
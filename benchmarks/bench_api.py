@@ -0,0 +1,176 @@
+"""
+Задержки POST /image и GET /image/{id}/{resolution} под конкурентной
+нагрузкой через in-process ASGI-клиент (httpx.ASGITransport).
+
+БД и RabbitMQ подменены стендами из benchmarks.standins, поэтому
+измеряется сам путь запроса: multipart-парсинг, probe_image, запись
+оригинала и отдача миниатюры.
+
+    python -m benchmarks.bench_api --requests 500 --concurrency 20
+"""
+import argparse
+import asyncio
+import json
+import logging
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+import httpx
+from fastapi import FastAPI
+
+from app.job_queue import JobQueue
+from app.models import ImageStatus
+from app.thumbnails import resize_image
+from benchmarks.common import latency_summary
+from benchmarks.corpus import CORPUS, CorpusItem, build_corpus
+from benchmarks.standins import MemoryProducer, MemorySessionMaker, MemoryStore
+
+CONTENT_TYPES = {
+    "JPEG": "image/jpeg",
+    "PNG": "image/png",
+    "GIF": "image/gif",
+}
+
+
+@contextmanager
+def memory_app(
+        store: MemoryStore,
+        producer: JobQueue,
+        image_dir: str,
+) -> Iterator[FastAPI]:
+    """Приложение с подменёнными БД и продюсером."""
+    from app.admission import get_admission_controller
+    from app.app import app
+    from app.database import get_async_db_session, get_async_read_session
+    from app.job_queue import get_job_queue
+    from app.settings import settings
+
+    saved = settings.PATH_TO_IMAGE, settings.MAX_IMG_SIZE
+    settings.PATH_TO_IMAGE = image_dir
+    # Корпус содержит файлы больше лимита из .env.
+    settings.MAX_IMG_SIZE = max(settings.MAX_IMG_SIZE, 64 * 1024 * 1024)
+    session_maker = MemorySessionMaker(store)
+    app.dependency_overrides[get_async_db_session] = session_maker.dependency
+    app.dependency_overrides[get_async_read_session] = (
+        session_maker.dependency
+    )
+    app.dependency_overrides[get_job_queue] = lambda: producer
+    # Вся нагрузка идёт с одного адреса — лимит на клиента её бы срезал.
+    admission_controller = get_admission_controller()
+    rate_limiter = admission_controller.rate_limiter
+    admission_controller.rate_limiter = None
+    try:
+        yield app
+    finally:
+        admission_controller.rate_limiter = rate_limiter
+        app.dependency_overrides.clear()
+        settings.PATH_TO_IMAGE, settings.MAX_IMG_SIZE = saved
+
+
+async def load(
+        client: httpx.AsyncClient,
+        requests: int,
+        concurrency: int,
+        method: str,
+        url: str,
+        **kwargs,
+) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    seconds = time.perf_counter() - start
+    return {
+        "requests_per_sec": requests / seconds,
+        **latency_summary(latencies),
+        "errors": errors,
+    }
+
+
+async def bench_item(
+        item: CorpusItem,
+        original: Path,
+        requests: int,
+        concurrency: int,
+        resolution: int,
+) -> list[dict]:
+    store = MemoryStore()
+    producer = MemoryProducer()
+    data = original.read_bytes()
+    with tempfile.TemporaryDirectory() as tmp, \
+            memory_app(store, producer, tmp) as app:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            upload = await load(
+                client, requests, concurrency, "POST", "/image",
+                files={"image": (
+                    item.filename, data, CONTENT_TYPES[item.format],
+                )},
+            )
+
+            # Готовая миниатюра для GET: статус DONE и файл на диске.
+            img = next(iter(store.images.values()))
+            img.status = ImageStatus.DONE
+            thumb = Path(tmp) / f"{img.id}_{resolution}.jpg"
+            resize_image(original, thumb, resolution)
+            download = await load(
+                client, requests, concurrency, "GET",
+                f"/image/{img.id}/{resolution}",
+            )
+    return [
+        {"endpoint": "POST /image", "image": item.name, **upload},
+        {"endpoint": "GET /image/{id}/{resolution}", "image": item.name,
+         **download},
+    ]
+
+
+def run(
+        corpus_dir: Path,
+        requests: int,
+        concurrency: int,
+        items: tuple[CorpusItem, ...] = CORPUS[:3],
+) -> list[dict]:
+    from app.settings import settings
+
+    logging.disable(logging.ERROR)
+    resolution = max(settings.THUMBNAILS_RESOLUTION)
+    results = []
+    for item, path in build_corpus(corpus_dir, items):
+        results.extend(asyncio.run(bench_item(
+            item, path, requests, concurrency, resolution,
+        )))
+    logging.disable(logging.NOTSET)
+    for result in results:
+        result["concurrency"] = concurrency
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--corpus-dir", type=Path,
+                        default=Path(".bench_corpus"))
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    results = run(args.corpus_dir, args.requests, args.concurrency)
+    print(json.dumps(results, indent=2))  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+uuid4 против UUIDv7 (app.ids.uuid7) в первичном ключе.
+
+Без флагов — только скорость генерации id в Python. С --postgres —
+вставка --rows строк в таблицы bench_ids_v4 / bench_ids_v7 (uuid PRIMARY
+KEY, как у images) в Postgres из .env пачками через COPY: строки/сек,
+размер индекса первичного ключа и объём WAL на вставку. Таблицы
+удаляются после прогона.
+
+    python -m benchmarks.bench_ids --count 1000000
+    python -m benchmarks.bench_ids --postgres --rows 3000000
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime
+from typing import Callable
+from uuid import UUID, uuid4
+
+from app.ids import uuid7
+
+GENERATORS: dict[str, Callable[[], UUID]] = {"v4": uuid4, "v7": uuid7}
+MB = 1024 * 1024
+
+
+def measure_generate(count: int) -> list[dict]:
+    results = []
+    for version, generate in GENERATORS.items():
+        start = time.perf_counter()
+        for _ in range(count):
+            generate()
+        elapsed = time.perf_counter() - start
+        results.append({
+            "version": version,
+            "ids_per_sec": count / elapsed,
+        })
+    return results
+
+
+async def measure_insert(rows: int, batch: int) -> list[dict]:
+    import asyncpg
+
+    from app.settings import settings
+
+    dsn = settings.database_url.replace("postgresql+asyncpg", "postgresql")
+    connection = await asyncpg.connect(dsn)
+    results = []
+    try:
+        for version, generate in GENERATORS.items():
+            table = f"bench_ids_{version}"
+            await connection.execute(f"DROP TABLE IF EXISTS {table}")
+            await connection.execute(
+                f"CREATE TABLE {table} (id uuid PRIMARY KEY, "
+                "created_at timestamp NOT NULL, payload text NOT NULL)"
+            )
+            wal_start = await connection.fetchval(
+                "SELECT pg_current_wal_lsn()"
+            )
+            start = time.perf_counter()
+            for offset in range(0, rows, batch):
+                now = datetime.now()
+                records = [
+                    (generate(), now, "x" * 64)
+                    for _ in range(min(batch, rows - offset))
+                ]
+                await connection.copy_records_to_table(
+                    table,
+                    records=records,
+                )
+            elapsed = time.perf_counter() - start
+            wal_bytes = await connection.fetchval(
+                "SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), $1)",
+                wal_start,
+            )
+            index_bytes = await connection.fetchval(
+                "SELECT pg_relation_size($1::regclass)",
+                f"{table}_pkey",
+            )
+            results.append({
+                "version": version,
+                "rows": rows,
+                "rows_per_sec": rows / elapsed,
+                "index_mb": index_bytes / MB,
+                "wal_mb": float(wal_bytes) / MB,
+            })
+            await connection.execute(f"DROP TABLE {table}")
+    finally:
+        await connection.close()
+    return results
+
+
+def run(count: int) -> list[dict]:
+    return measure_generate(count)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--postgres", action="store_true")
+    parser.add_argument("--rows", type=int, default=3_000_000)
+    parser.add_argument("--batch", type=int, default=10_000)
+    args = parser.parse_args()
+    results = measure_generate(args.count)
+    if args.postgres:
+        results += asyncio.run(measure_insert(args.rows, args.batch))
+    print(json.dumps(results, indent=2))  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Сравнение синхронного JSON-логирования (StreamHandler + JsonFormatter,
+как было) с очередью (setup_logging: QueueHandler + orjson).
+
+Меряется время на стороне вызывающего: log calls/sec и p50/p99 запросов
+ASGI-приложения, которое пишет несколько INFO на запрос. Два приёмника:
+локальный файл и «медленный» поток, где каждая запись блокируется на
+--sink-delay-us (как stdout-пайп, который не успевает вычитывать
+docker log driver).
+
+    python -m benchmarks.bench_logging --calls 50000 --requests 2000
+"""
+import argparse
+import asyncio
+import json
+import logging
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+import httpx
+from fastapi import FastAPI
+from pythonjsonlogger.json import JsonFormatter
+
+from app.logging.logging import setup_logging
+from benchmarks.common import percentile
+
+LOGS_PER_REQUEST = 5
+
+
+class SlowStream:
+    """Поток, запись в который блокирует поток на delay секунд."""
+
+    def __init__(self, stream, delay: float) -> None:
+        self.stream = stream
+        self.delay = delay
+
+    def write(self, data: str) -> int:
+        time.sleep(self.delay)
+        return self.stream.write(data)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+
+def setup_sync(stream) -> None:
+    logger = logging.getLogger()
+    for handler in logger.handlers[:]:
+        logger.removeHandler(handler)
+        handler.close()
+    logger.setLevel(logging.INFO)
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JsonFormatter(
+        "%(asctime)s %(name)s %(levelname)s %(message)s"
+    ))
+    logger.addHandler(handler)
+
+
+def setup_queued(stream) -> None:
+    setup_logging("INFO", sample_rate=1.0, stream=stream)
+
+
+def bench_calls(calls: int) -> float:
+    logger = logging.getLogger("bench.calls")
+    start = time.perf_counter()
+    for i in range(calls):
+        logger.info("Thumbnail saved: %s", i)
+    return calls / (time.perf_counter() - start)
+
+
+async def bench_requests(requests: int, concurrency: int) -> dict:
+    app = FastAPI()
+    logger = logging.getLogger("bench.app")
+
+    @app.get("/image_info/{id}")
+    async def image_info(id: str):
+        for i in range(LOGS_PER_REQUEST):
+            logger.info("step %s for %s", i, id)
+        return {"id": id}
+
+    transport = httpx.ASGITransport(app=app)
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        async def one(i: int) -> None:
+            async with semaphore:
+                start = time.perf_counter()
+                await client.get(f"/image_info/{i}")
+                latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(one(i) for i in range(requests)))
+
+    return {
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def run_mode(
+        name: str,
+        setup: Callable,
+        log_path: Path,
+        sink_delay: float,
+        calls: int,
+        requests: int,
+        concurrency: int,
+) -> dict:
+    with open(log_path, "w") as file:
+        stream = SlowStream(file, sink_delay) if sink_delay else file
+        setup(stream)
+        calls_per_sec = bench_calls(calls)
+        latency = asyncio.run(bench_requests(requests, concurrency))
+        dropped = 0
+        # Закрываем хендлеры: для очереди это дожидается записи хвоста.
+        for handler in logging.getLogger().handlers:
+            dropped += getattr(handler, "dropped", 0)
+            handler.close()
+    return {
+        "mode": name,
+        "sink": "slow" if sink_delay else "file",
+        "log_calls_per_sec": calls_per_sec,
+        **latency,
+        "dropped": dropped,
+    }
+
+
+def run(
+        calls: int,
+        requests: int,
+        concurrency: int,
+        sink_delay: float,
+) -> list[dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for delay in (0.0, sink_delay):
+            for name, setup in (
+                ("sync", setup_sync),
+                ("queued", setup_queued),
+            ):
+                results.append(run_mode(
+                    name,
+                    setup,
+                    Path(tmp) / f"{name}.log",
+                    delay,
+                    calls,
+                    requests,
+                    concurrency,
+                ))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=50000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--sink-delay-us", type=float, default=50)
+    args = parser.parse_args()
+    results = run(
+        args.calls,
+        args.requests,
+        args.concurrency,
+        args.sink_delay_us / 1e6,
+    )
+    print(json.dumps(results, indent=2))  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Сквозной прогон загрузка → очередь → воркер: N загрузок через
+POST /image, воркер в том же процессе с prefetch потребителями.
+Время изображения — от начала загрузки до конца handle_job.
+
+--backend memory (по умолчанию) — БД и очередь из benchmarks.standins.
+--backend inprocess — БД из стендов, очередь — InProcessQueue
+(QUEUE_BACKEND=inprocess) с пулом из INPROCESS_WORKERS процессов.
+--backend local — настоящие Postgres и RabbitMQ из .env (docker compose
+с применёнными миграциями); сообщения идут в отдельную очередь
+<QUEUE_NAME>_bench, чтобы их не забрал запущенный воркер.
+
+    python -m benchmarks.bench_pipeline --images 50 --prefetch 4
+"""
+import argparse
+import asyncio
+import json
+import logging
+import tempfile
+import time
+from contextlib import AsyncExitStack
+from pathlib import Path
+from typing import Callable
+
+import httpx
+
+from app.models import ImageStatus
+from benchmarks.bench_api import CONTENT_TYPES, memory_app
+from benchmarks.common import latency_summary, peak_rss_mb
+from benchmarks.corpus import CORPUS, CorpusItem, build_corpus
+from benchmarks.standins import MemoryProducer, MemorySessionMaker, MemoryStore
+
+# (image_id, failed) — вызывается, когда задача завершена.
+OnDone = Callable[[str, bool], None]
+
+
+def message_handler(on_done: OnDone):
+    from worker import process_message
+
+    async def handle(message) -> None:
+        failed = False
+        try:
+            await process_message(message)
+        except Exception:
+            failed = True
+        finally:
+            on_done(json.loads(message.body.decode())["image_id"], failed)
+
+    return handle
+
+
+def use_memory_store(
+        stack: AsyncExitStack,
+        store: MemoryStore,
+        image_dir: str,
+) -> None:
+    import worker
+
+    saved_session_gen = worker.session_gen
+    worker.session_gen = MemorySessionMaker(store)  # type: ignore[assignment]
+    stack.callback(setattr, worker, "session_gen", saved_session_gen)
+    worker.settings.PATH_TO_IMAGE = image_dir
+
+
+async def memory_backend(
+        stack: AsyncExitStack,
+        image_dir: str,
+        prefetch: int,
+):
+    store = MemoryStore()
+    producer = MemoryProducer()
+    app = stack.enter_context(memory_app(store, producer, image_dir))
+    use_memory_store(stack, store, image_dir)
+
+    async def consume(on_done: OnDone) -> None:
+        handle = message_handler(on_done)
+
+        async def consumer() -> None:
+            while True:
+                message = await producer.queue.get()
+                await handle(message)
+                producer.queue.task_done()
+
+        tasks = [asyncio.create_task(consumer()) for _ in range(prefetch)]
+        stack.callback(lambda: [task.cancel() for task in tasks])
+
+    return app, consume
+
+
+async def inprocess_backend(
+        stack: AsyncExitStack,
+        image_dir: str,
+        prefetch: int,
+):
+    from app.inprocess_queue import InProcessQueue
+    from app.settings import settings
+
+    store = MemoryStore()
+    queue = InProcessQueue(
+        settings.QUEUE_NAME,
+        prefetch,
+        settings.INPROCESS_WORKERS,
+    )
+    app = stack.enter_context(memory_app(store, queue, image_dir))
+    use_memory_store(stack, store, image_dir)
+    await queue.connect()
+    stack.push_async_callback(queue.close)
+
+    async def consume(on_done: OnDone) -> None:
+        # Задачи разбирает сама очередь, конец виден по статусу в store.
+        async def watch() -> None:
+            seen: set[str] = set()
+            while True:
+                for image_id, img in list(store.images.items()):
+                    final = img.status in (ImageStatus.DONE, ImageStatus.ERROR)
+                    if final and image_id not in seen:
+                        seen.add(image_id)
+                        on_done(image_id, img.status == ImageStatus.ERROR)
+                await asyncio.sleep(0.005)
+
+        task = asyncio.create_task(watch())
+        stack.callback(task.cancel)
+
+    return app, consume
+
+
+async def local_backend(
+        stack: AsyncExitStack,
+        image_dir: str,
+        prefetch: int,
+):
+    import aio_pika
+
+    import worker
+    from app.app import app
+    from app.job_queue import get_job_queue
+    from app.rabbit_producer import RabbitMQProducer
+    from app.settings import settings
+
+    queue_name = f"{settings.QUEUE_NAME}_bench"
+    producer = RabbitMQProducer(settings.RABBIT_URL, queue_name)
+    await producer.connect()
+    stack.push_async_callback(producer.close)
+    app.dependency_overrides[get_job_queue] = lambda: producer
+    stack.callback(app.dependency_overrides.clear)
+    settings.PATH_TO_IMAGE = image_dir
+    worker.settings.PATH_TO_IMAGE = image_dir
+
+    connection = await aio_pika.connect_robust(settings.RABBIT_URL)
+    stack.push_async_callback(connection.close)
+    channel = await connection.channel()
+    await channel.set_qos(prefetch_count=prefetch)
+    queue = await channel.declare_queue(queue_name, durable=True)
+
+    async def consume(on_done: OnDone) -> None:
+        await queue.consume(message_handler(on_done))
+
+    return app, consume
+
+
+BACKENDS = {
+    "memory": memory_backend,
+    "inprocess": inprocess_backend,
+    "local": local_backend,
+}
+
+
+async def bench_item(
+        backend: str,
+        item: CorpusItem,
+        original: Path,
+        images: int,
+        concurrency: int,
+        prefetch: int,
+) -> dict:
+    data = original.read_bytes()
+    started: dict[str, float] = {}
+    finished: dict[str, float] = {}
+    all_done = asyncio.Event()
+    errors = 0
+
+    def on_done(image_id: str, failed: bool) -> None:
+        nonlocal errors
+        errors += failed
+        finished[image_id] = time.perf_counter()
+        if len(finished) == images:
+            all_done.set()
+
+    async with AsyncExitStack() as stack:
+        image_dir = stack.enter_context(tempfile.TemporaryDirectory())
+        app, consume = await BACKENDS[backend](
+            stack, image_dir, prefetch,
+        )
+        await consume(on_done)
+
+        transport = httpx.ASGITransport(app=app)
+        client = await stack.enter_async_context(httpx.AsyncClient(
+            transport=transport, base_url="http://bench",
+        ))
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def upload() -> None:
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post("/image", files={"image": (
+                    item.filename, data, CONTENT_TYPES[item.format],
+                )})
+                response.raise_for_status()
+                started[response.json()["id"]] = start
+
+        start = time.perf_counter()
+        await asyncio.gather(*(upload() for _ in range(images)))
+        await all_done.wait()
+        seconds = time.perf_counter() - start
+
+    latencies = [finished[id] - started[id] for id in finished]
+    return {
+        "backend": backend,
+        "image": item.name,
+        "images": images,
+        "prefetch": prefetch,
+        "images_per_sec": images / seconds,
+        "megapixels_per_sec": images * item.megapixels / seconds,
+        **latency_summary(latencies),
+        "errors": errors,
+    }
+
+
+def run(
+        corpus_dir: Path,
+        images: int,
+        concurrency: int,
+        prefetch: int,
+        backend: str = "memory",
+        items: tuple[CorpusItem, ...] = CORPUS[1:3],
+) -> list[dict]:
+    logging.disable(logging.ERROR)
+    results = []
+    for item, path in build_corpus(corpus_dir, items):
+        results.append(asyncio.run(bench_item(
+            backend, item, path, images, concurrency, prefetch,
+        )))
+    logging.disable(logging.NOTSET)
+    # Для всего прогона: воркер и API живут в этом же процессе.
+    for result in results:
+        result["peak_rss_mb"] = peak_rss_mb()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--corpus-dir", type=Path,
+                        default=Path(".bench_corpus"))
+    parser.add_argument("--backend", choices=list(BACKENDS),
+                        default="memory")
+    parser.add_argument("--images", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--prefetch", type=int, default=4)
+    args = parser.parse_args()
+    results = run(
+        args.corpus_dir,
+        args.images,
+        args.concurrency,
+        args.prefetch,
+        args.backend,
+    )
+    print(json.dumps(results, indent=2))  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
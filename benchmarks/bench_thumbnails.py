@@ -0,0 +1,124 @@
+"""
+Пропускная способность resize_image и generate_thumbnails на корпусе
+синтетических изображений: images/sec, MP/sec и пиковый RSS.
+
+Каждый случай считается в отдельном spawn-процессе: ru_maxrss растёт
+монотонно, и в общем процессе пик большого изображения скрыл бы все
+следующие.
+
+    python -m benchmarks.bench_thumbnails --repeat 3
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import shutil
+import tempfile
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from benchmarks.common import peak_rss_mb
+from benchmarks.corpus import CORPUS, CorpusItem, build_corpus
+
+
+def measure_resize(original: str, resolution: int, repeat: int) -> dict:
+    from app.thumbnails import resize_image
+
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as tmp:
+        thumb_path = Path(tmp) / "thumb.jpg"
+        baseline = peak_rss_mb()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            resize_image(Path(original), thumb_path, resolution)
+        seconds = time.perf_counter() - start
+    return {
+        "seconds": seconds,
+        "peak_rss_mb": peak_rss_mb(),
+        "rss_growth_mb": peak_rss_mb() - baseline,
+    }
+
+
+def measure_generate(original: str, repeat: int) -> dict:
+    import worker
+
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as tmp:
+        worker.settings.PATH_TO_IMAGE = tmp
+        image_ids = []
+        for _ in range(repeat):
+            image_id = str(uuid.uuid4())
+            shutil.copy(original, Path(tmp) / image_id)
+            image_ids.append(image_id)
+
+        async def run() -> None:
+            for image_id in image_ids:
+                await worker.generate_thumbnails(image_id)
+
+        baseline = peak_rss_mb()
+        start = time.perf_counter()
+        asyncio.run(run())
+        seconds = time.perf_counter() - start
+    return {
+        "seconds": seconds,
+        "peak_rss_mb": peak_rss_mb(),
+        "rss_growth_mb": peak_rss_mb() - baseline,
+        "resolutions": list(worker.settings.THUMBNAILS_RESOLUTION),
+    }
+
+
+def throughput(item: CorpusItem, repeat: int, measured: dict) -> dict:
+    seconds = measured.pop("seconds")
+    return {
+        "image": item.name,
+        "format": item.format,
+        "megapixels": item.megapixels,
+        "images_per_sec": repeat / seconds,
+        "megapixels_per_sec": repeat * item.megapixels / seconds,
+        **measured,
+    }
+
+
+def run_isolated(func, *args) -> dict:
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(func, *args).result()
+
+
+def run(
+        corpus_dir: Path,
+        repeat: int,
+        resolution: int,
+        items: tuple[CorpusItem, ...] = CORPUS,
+) -> dict:
+    resize_results = []
+    generate_results = []
+    for item, path in build_corpus(corpus_dir, items):
+        resize_results.append(throughput(item, repeat, run_isolated(
+            measure_resize, str(path), resolution, repeat,
+        )))
+        generate_results.append(throughput(item, repeat, run_isolated(
+            measure_generate, str(path), repeat,
+        )))
+    return {
+        "resize_image": resize_results,
+        "generate_thumbnails": generate_results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--corpus-dir", type=Path,
+                        default=Path(".bench_corpus"))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--resolution", type=int, default=1200)
+    args = parser.parse_args()
+    results = run(args.corpus_dir, args.repeat, args.resolution)
+    print(json.dumps(results, indent=2))  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
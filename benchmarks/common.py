@@ -0,0 +1,29 @@
+import resource
+import sys
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(int(len(ordered) * pct / 100), len(ordered) - 1)
+    return ordered[index]
+
+
+def latency_summary(latencies: list[float]) -> dict:
+    """Задержки в секундах → p50/p90/p99/max в миллисекундах."""
+    if not latencies:
+        return {}
+    return {
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p90_ms": percentile(latencies, 90) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": max(latencies) * 1000,
+    }
+
+
+def peak_rss_mb() -> float:
+    """Пиковый RSS текущего процесса за всё время его жизни."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux отдаёт килобайты, macOS — байты.
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
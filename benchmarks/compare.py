@@ -0,0 +1,111 @@
+"""
+Сравнение двух файлов результатов python -m benchmarks.
+
+    python -m benchmarks.compare base.json head.json --threshold 10
+
+Метрики сопоставляются по строковым полям записи (image, endpoint,
+mode, ...). Направление берётся из имени: *_per_sec — больше лучше,
+*_ms, *_mb, errors, dropped — меньше лучше. Код выхода 1, если хоть
+одна метрика ухудшилась больше чем на --threshold процентов.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+HIGHER_IS_BETTER = ("_per_sec",)
+LOWER_IS_BETTER = ("_ms", "_mb", "errors", "dropped")
+
+
+def direction(metric: str) -> int:
+    """+1 — больше лучше, -1 — меньше лучше, 0 — не метрика."""
+    if metric.endswith(HIGHER_IS_BETTER):
+        return 1
+    if metric.endswith(LOWER_IS_BETTER):
+        return -1
+    return 0
+
+
+def flatten(value, prefix: str = "") -> dict[str, float]:
+    metrics: dict[str, float] = {}
+    dot = "." if prefix else ""
+    if isinstance(value, dict):
+        labels = ",".join(
+            f"{key}={item}"
+            for key, item in value.items()
+            if isinstance(item, str)
+        )
+        if labels:
+            prefix = f"{prefix}[{labels}]"
+        for key, item in value.items():
+            if isinstance(item, (dict, list)):
+                metrics.update(flatten(item, f"{prefix}{dot}{key}"))
+            elif isinstance(item, (int, float)) and direction(key):
+                metrics[f"{prefix}{dot}{key}"] = float(item)
+    elif isinstance(value, list):
+        for item in value:
+            metrics.update(flatten(item, prefix))
+    return metrics
+
+
+def compare(
+        base: dict,
+        head: dict,
+        threshold: float,
+) -> tuple[list[tuple[str, float, float, float]], list[str]]:
+    """
+    Возвращает строки (метрика, base, head, изменение в %) и список
+    метрик, ухудшившихся больше чем на threshold процентов.
+    """
+    base_metrics = flatten(base["suites"])
+    head_metrics = flatten(head["suites"])
+    rows = []
+    regressions = []
+    for name in sorted(base_metrics.keys() & head_metrics.keys()):
+        before, after = base_metrics[name], head_metrics[name]
+        if before == 0:
+            change = 0.0 if after == 0 else float("inf")
+        else:
+            change = (after - before) / before * 100
+        rows.append((name, before, after, change))
+        metric = name.rsplit(".", 1)[-1]
+        if -direction(metric) * change > threshold:
+            regressions.append(name)
+    return rows, regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("base", type=Path)
+    parser.add_argument("head", type=Path)
+    parser.add_argument("--threshold", type=float, default=10.0)
+    args = parser.parse_args()
+
+    base = json.loads(args.base.read_text())
+    head = json.loads(args.head.read_text())
+    for side in (base, head):
+        meta = side["meta"]
+        print(  # noqa: T201
+            f"{meta['commit'][:12]}{' (dirty)' if meta['dirty'] else ''}"
+            f" {meta['timestamp']} profile={side['profile']}"
+        )
+    if base["params"] != head["params"]:
+        print("warning: runs used different parameters")  # noqa: T201
+
+    rows, regressions = compare(base, head, args.threshold)
+    for name, before, after, change in rows:
+        mark = " !" if name in regressions else ""
+        print(  # noqa: T201
+            f"{name:<90} {before:>12.2f} {after:>12.2f} {change:>+8.1f}%"
+            f"{mark}"
+        )
+    if regressions:
+        print(  # noqa: T201
+            f"{len(regressions)} metric(s) regressed by more than "
+            f"{args.threshold}%"
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Детерминированный набор синтетических изображений для бенчмарков.
+
+Градиент + шум из random.Random(seed): JPEG/PNG сжимаются примерно как
+фотографии, а не как однотонная заливка, и файлы совпадают между
+запусками и машинами.
+"""
+import random
+from dataclasses import dataclass
+from pathlib import Path
+
+from PIL import Image as PILImage
+
+
+@dataclass(frozen=True)
+class CorpusItem:
+    name: str
+    width: int
+    height: int
+    format: str
+
+    @property
+    def megapixels(self) -> float:
+        return self.width * self.height / 1_000_000
+
+    @property
+    def filename(self) -> str:
+        return f"{self.name}.{self.format.lower()}"
+
+
+CORPUS = (
+    CorpusItem("vga_jpeg", 640, 480, "JPEG"),
+    CorpusItem("fullhd_jpeg", 1920, 1080, "JPEG"),
+    CorpusItem("12mp_jpeg", 4000, 3000, "JPEG"),
+    CorpusItem("48mp_jpeg", 8000, 6000, "JPEG"),
+    CorpusItem("fullhd_png", 1920, 1080, "PNG"),
+    CorpusItem("12mp_png", 4000, 3000, "PNG"),
+    CorpusItem("svga_gif", 800, 600, "GIF"),
+)
+
+
+def synthetic_image(width: int, height: int, seed: int) -> PILImage.Image:
+    rnd = random.Random(seed)
+    gradient = PILImage.linear_gradient("L").resize((width, height))
+    blobs = PILImage.frombytes("L", (64, 48), rnd.randbytes(64 * 48))
+    blobs = blobs.resize((width, height), PILImage.Resampling.BICUBIC)
+    noise = PILImage.frombytes(
+        "L", (width, height), rnd.randbytes(width * height),
+    )
+    grain = PILImage.blend(blobs, noise, 0.15)
+    return PILImage.merge("RGB", (gradient, grain, blobs))
+
+
+def build_corpus(
+        directory: Path,
+        items: tuple[CorpusItem, ...] = CORPUS,
+) -> list[tuple[CorpusItem, Path]]:
+    directory.mkdir(parents=True, exist_ok=True)
+    corpus = []
+    for seed, item in enumerate(items):
+        path = directory / item.filename
+        if not path.exists():
+            img = synthetic_image(item.width, item.height, seed)
+            if item.format == "GIF":
+                img = img.convert("P", palette=PILImage.Palette.ADAPTIVE)
+            save_kwargs = {"quality": 90} if item.format == "JPEG" else {}
+            img.save(path, item.format, **save_kwargs)
+        corpus.append((item, path))
+    return corpus
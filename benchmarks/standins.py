@@ -0,0 +1,124 @@
+"""
+Подмены Postgres и RabbitMQ в памяти процесса.
+
+Настоящие ImageRepository, ImageService и worker.handle_job работают
+поверх них без изменений: MemorySession понимает ровно те запросы,
+которые они делают (add/commit/refresh и select(Image) по id).
+"""
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import AsyncIterator
+
+from app.ids import uuid7
+from app.models import Image, ImageStatus
+
+
+class MemoryStore:
+    def __init__(self) -> None:
+        self.images: dict[str, Image] = {}
+
+
+class MemoryResult:
+    def __init__(self, img: Image | None) -> None:
+        self.img = img
+
+    def scalar_one_or_none(self) -> Image | None:
+        return self.img
+
+    def scalar_one(self) -> Image:
+        if self.img is None:
+            raise LookupError("No row found")
+        return self.img
+
+
+class MemorySession:
+    # Не реплика: ImageService не перечитывает с primary.
+    bind = None
+
+    def __init__(self, store: MemoryStore) -> None:
+        self.store = store
+
+    def add(self, img: Image) -> None:
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        img.id = img.id or uuid7()
+        img.status = img.status or ImageStatus.NEW
+        img.created_at = now
+        img.updated_at = now
+        self.store.images[str(img.id)] = img
+
+    async def execute(self, stmt) -> MemoryResult:
+        # select(Image).where(image_id_filter(<id>)) — id в параметре id_1,
+        # остальные параметры — окно по created_at.
+        image_id = stmt.compile().params["id_1"]
+        return MemoryResult(self.store.images.get(str(image_id)))
+
+    async def commit(self) -> None:
+        await asyncio.sleep(0)
+
+    async def refresh(self, img: Image) -> None:
+        pass
+
+    async def rollback(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    async def __aenter__(self) -> "MemorySession":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        pass
+
+
+class MemorySessionMaker:
+    """Замена session_gen: каждый вызов — новая сессия над тем же store."""
+
+    def __init__(self, store: MemoryStore) -> None:
+        self.store = store
+
+    def __call__(self) -> MemorySession:
+        return MemorySession(self.store)
+
+    async def dependency(self) -> AsyncIterator[MemorySession]:
+        """Замена get_async_db_session для dependency_overrides."""
+        yield MemorySession(self.store)
+
+
+class MemoryMessage:
+    """То немногое из AbstractIncomingMessage, что читает воркер."""
+
+    def __init__(self, body: bytes, headers: dict) -> None:
+        self.body = body
+        self.headers = headers
+        self.timestamp = None
+
+    @asynccontextmanager
+    async def process(self) -> AsyncIterator[None]:
+        yield
+
+
+class MemoryProducer:
+    """Замена RabbitMQProducer: сообщения складываются в asyncio.Queue."""
+
+    def __init__(self, queue_name: str = "images") -> None:
+        self.queue_name = queue_name
+        self.queue: asyncio.Queue[MemoryMessage] = asyncio.Queue()
+
+    async def connect(self) -> None:
+        pass
+
+    async def send_message(self, message: dict) -> None:
+        await self.queue.put(MemoryMessage(
+            json.dumps(message).encode(),
+            {"x-published-at": time.time()},
+        ))
+
+    async def queue_depth(self) -> int:
+        return self.queue.qsize()
+
+    async def close(self) -> None:
+        pass
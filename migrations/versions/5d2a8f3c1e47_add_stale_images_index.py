@@ -0,0 +1,37 @@
+"""add_stale_images_index
+
+Revision ID: 5d2a8f3c1e47
+Revises: c9f41bde33ad
+Create Date: 2026-10-19 10:12:04.318227
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2a8f3c1e47'
+down_revision: Union[str, Sequence[str], None] = 'c9f41bde33ad'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_images_stale_updated_at',
+        'images',
+        ['updated_at'],
+        unique=False,
+        postgresql_where=sa.text("status IN ('NEW', 'PROCESSING')"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        'ix_images_stale_updated_at',
+        table_name='images',
+        postgresql_where=sa.text("status IN ('NEW', 'PROCESSING')"),
+    )
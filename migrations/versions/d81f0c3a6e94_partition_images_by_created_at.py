@@ -0,0 +1,124 @@
+"""partition_images_by_created_at
+
+Revision ID: d81f0c3a6e94
+Revises: b3d9e2f47a15
+Create Date: 2026-10-19 21:02:11.604381
+
+Таблица images пересоздаётся как секционированная по месяцам created_at
+(images_pYYYYMM) и заполняется из старой. Миграция копирует все строки
+в одной транзакции — на большой таблице её нужно запускать в окно
+обслуживания. Будущие секции создаёт reaper через
+images_create_partitions, старые уносит archive.py.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'd81f0c3a6e94'
+down_revision: Union[str, Sequence[str], None] = 'b3d9e2f47a15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = (
+    "id, status, original_filename, content_type, created_at, updated_at, "
+    "width, height, format, orientation, size_bytes, placeholder"
+)
+
+CREATE_PARTITIONS_FUNCTION = """
+CREATE OR REPLACE FUNCTION images_create_partitions(
+    from_month date,
+    to_month date
+) RETURNS integer LANGUAGE plpgsql AS $$
+DECLARE
+    m date := date_trunc('month', from_month);
+    partition_name text;
+    created integer := 0;
+BEGIN
+    WHILE m <= to_month LOOP
+        partition_name := 'images_p' || to_char(m, 'YYYYMM');
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF images '
+                'FOR VALUES FROM (%L) TO (%L)',
+                partition_name,
+                m,
+                (m + interval '1 month')::date
+            );
+            created := created + 1;
+        END IF;
+        m := (m + interval '1 month')::date;
+    END LOOP;
+    RETURN created;
+END
+$$
+"""
+
+
+def images_columns() -> list[sa.Column]:
+    return [
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('status', postgresql.ENUM('NEW', 'PROCESSING', 'DONE', 'ERROR', name='image_status', create_type=False), nullable=False),
+        sa.Column('original_filename', sa.String(length=255), nullable=False),
+        sa.Column('content_type', sa.String(length=100), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('width', sa.Integer(), nullable=True),
+        sa.Column('height', sa.Integer(), nullable=True),
+        sa.Column('format', sa.String(length=16), nullable=True),
+        sa.Column('orientation', sa.SmallInteger(), nullable=True),
+        sa.Column('size_bytes', sa.BigInteger(), nullable=True),
+        sa.Column('placeholder', sa.String(length=64), nullable=True),
+    ]
+
+
+def rename_images(new_name: str) -> None:
+    op.rename_table('images', new_name)
+    op.execute(f"ALTER TABLE {new_name} RENAME CONSTRAINT images_pkey TO {new_name}_pkey")
+    op.execute(f"ALTER INDEX ix_images_stale_updated_at RENAME TO ix_{new_name}_stale_updated_at")
+
+
+def create_stale_index() -> None:
+    op.create_index(
+        'ix_images_stale_updated_at',
+        'images',
+        ['updated_at'],
+        unique=False,
+        postgresql_where=sa.text("status IN ('NEW', 'PROCESSING')"),
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    rename_images('images_legacy')
+    op.create_table('images',
+    *images_columns(),
+    sa.PrimaryKeyConstraint('id', 'created_at'),
+    postgresql_partition_by='RANGE (created_at)',
+    )
+    create_stale_index()
+    op.execute(CREATE_PARTITIONS_FUNCTION)
+    # Секции от самой старой строки до трёх месяцев вперёд.
+    op.execute(
+        "SELECT images_create_partitions("
+        "coalesce((SELECT min(created_at) FROM images_legacy), now())::date, "
+        "(now() + interval '3 months')::date)"
+    )
+    op.execute(f"INSERT INTO images ({COLUMNS}) SELECT {COLUMNS} FROM images_legacy")
+    op.drop_table('images_legacy')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    rename_images('images_partitioned')
+    op.create_table('images',
+    *images_columns(),
+    sa.PrimaryKeyConstraint('id'),
+    )
+    create_stale_index()
+    # Архивированные (отсоединённые) секции не возвращаются.
+    op.execute(f"INSERT INTO images ({COLUMNS}) SELECT {COLUMNS} FROM images_partitioned")
+    op.drop_table('images_partitioned')
+    op.execute("DROP FUNCTION images_create_partitions(date, date)")
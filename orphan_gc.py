@@ -0,0 +1,240 @@
+"""
+Сборка мусора в PATH_TO_IMAGE: файлы, для которых нет строки в БД.
+
+- {id} и {id}_{resolution}.jpg — оригинал и миниатюры; сирота, если id
+  нет в images (упавшая загрузка или генерация, удалённая строка);
+- {id}.part — возобновляемая загрузка; сирота, если id нет в
+  upload_sessions (просроченные сессии с файлами удаляет reaper);
+- {id}_{resolution}.jpg[.{hex}].tmp — недописанная миниатюра (воркер
+  убит посреди записи); убирается по одному возрасту, без запроса в БД.
+
+Каталог читается потоково (os.scandir), id проверяются в БД пачками.
+Файлы моложе --min-age не трогаются: их строка может быть ещё не
+закоммичена (а временный файл — ещё пишется). Остальные имена
+пропускаются.
+Не запускать одновременно с archive.py: пока секция отсоединена, её
+строк уже нет в images, а файлы ещё не перенесены.
+
+    python orphan_gc.py --dry-run
+    python orphan_gc.py --quarantine /data/quarantine --rate 200
+"""
+import argparse
+import asyncio
+import logging
+import os
+import re
+import shutil
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+from uuid import UUID
+
+from app.database import session_gen, shutdown
+from app.logging.logging import setup_logging
+from app.repositories.image_repository import ImageRepository
+from app.repositories.upload_repository import UploadRepository
+from app.settings import settings
+from app.throttle import Throttle
+
+setup_logging()
+logger = logging.getLogger("image_orphan_gc")
+
+FILE_NAME = re.compile(
+    r"^(?P<id>[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})"
+    r"(?:_(?P<resolution>\d+)\.jpg(?P<tmp>(?:\.[0-9a-f]{32})?\.tmp)?"
+    r"|(?P<part>\.part))?$"
+)
+
+ORIGINAL = "original"
+THUMBNAIL = "thumbnail"
+PART = "part"
+TEMP = "temp"
+
+
+@dataclass
+class StoredFile:
+    name: str
+    id: UUID
+    kind: str
+    size: int
+
+
+def classify(name: str) -> tuple[UUID, str] | None:
+    match = FILE_NAME.match(name)
+    if not match:
+        return None
+    if match["tmp"]:
+        kind = TEMP
+    elif match["part"]:
+        kind = PART
+    elif match["resolution"]:
+        kind = THUMBNAIL
+    else:
+        kind = ORIGINAL
+    return UUID(match["id"]), kind
+
+
+def scan(
+        directory: Path,
+        min_age: float,
+        batch_size: int,
+        stats: Counter,
+) -> Iterator[list[StoredFile]]:
+    """Пачки подходящих по имени и возрасту файлов, без списка в памяти."""
+    cutoff = time.time() - min_age
+    batch: list[StoredFile] = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            stats["scanned"] += 1
+            parsed = classify(entry.name)
+            if not parsed or not entry.is_file(follow_symlinks=False):
+                stats["skipped_unknown"] += 1
+                continue
+            stat = entry.stat(follow_symlinks=False)
+            if stat.st_mtime > cutoff:
+                stats["skipped_young"] += 1
+                continue
+            batch.append(StoredFile(entry.name, *parsed, stat.st_size))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+async def find_orphans(batch: list[StoredFile]) -> list[StoredFile]:
+    image_ids = list({
+        f.id for f in batch if f.kind in (ORIGINAL, THUMBNAIL)
+    })
+    upload_ids = list({f.id for f in batch if f.kind == PART})
+    async with session_gen() as session:
+        existing: set[UUID] = set()
+        if image_ids:
+            existing |= await ImageRepository(session).existing_ids(
+                image_ids,
+            )
+        if upload_ids:
+            existing |= await UploadRepository(session).existing_ids(
+                upload_ids,
+            )
+    # Временный файл старше --min-age никто уже не допишет, даже если
+    # строка изображения есть.
+    return [f for f in batch if f.kind == TEMP or f.id not in existing]
+
+
+def remove_file(path: Path, quarantine: Path | None) -> None:
+    try:
+        if quarantine:
+            shutil.move(path, quarantine / path.name)
+        else:
+            path.unlink()
+    except FileNotFoundError:
+        # Уже убран: reaper, повторный запуск или finalize загрузки.
+        pass
+
+
+async def collect(
+        directory: Path,
+        dry_run: bool,
+        quarantine: Path | None,
+        min_age: float,
+        workers: int,
+        rate: float | None,
+        batch_size: int = 1000,
+) -> Counter:
+    stats: Counter = Counter()
+    throttle = Throttle(rate)
+    in_flight = asyncio.Semaphore(workers)
+    tasks: set[asyncio.Task] = set()
+
+    async def remove(path: Path) -> None:
+        try:
+            await asyncio.to_thread(remove_file, path, quarantine)
+        except OSError as e:
+            stats["errors"] += 1
+            logger.error(f"[!] Failed to remove {path}:", exc_info=e)
+        finally:
+            in_flight.release()
+
+    batches = scan(directory, min_age, batch_size, stats)
+    while True:
+        # Чтение каталога блокирует — по пачке в отдельном потоке.
+        batch = await asyncio.to_thread(next, batches, None)
+        if batch is None:
+            break
+        for orphan in await find_orphans(batch):
+            stats["orphans"] += 1
+            stats[f"orphan_{orphan.kind}"] += 1
+            stats["orphan_bytes"] += orphan.size
+            if dry_run:
+                logger.debug(f"Orphan {orphan.name}")
+                continue
+            await in_flight.acquire()
+            await throttle.wait()
+            task = asyncio.create_task(remove(directory / orphan.name))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+    if tasks:
+        await asyncio.gather(*tasks)
+    return stats
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="only report orphans",
+    )
+    parser.add_argument(
+        "--quarantine",
+        type=Path,
+        default=None,
+        help="move orphans here instead of deleting them",
+    )
+    parser.add_argument(
+        "--min-age",
+        type=float,
+        default=3600,
+        help="skip files modified less than this many seconds ago",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="parallel file operations",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=None,
+        help="max files removed per second",
+    )
+    args = parser.parse_args()
+
+    if args.quarantine:
+        args.quarantine.mkdir(parents=True, exist_ok=True)
+    try:
+        stats = await collect(
+            Path(settings.PATH_TO_IMAGE),
+            args.dry_run,
+            args.quarantine,
+            args.min_age,
+            args.workers,
+            args.rate,
+        )
+    finally:
+        await shutdown()
+
+    summary = ", ".join(f"{k}={v}" for k, v in sorted(stats.items()))
+    if args.dry_run:
+        logger.info(f"Dry run: orphans would be removed ({summary})")
+    else:
+        logger.info(f"Orphan GC done ({summary})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,26 @@
+import asyncio
+import logging
+
+from app.database import shutdown
+from app.logging.logging import setup_logging
+from app.rabbit_producer import get_rabbit_producer
+from app.services.reaper_service import run_reaper
+
+setup_logging()
+logger = logging.getLogger("image_reaper")
+
+
+async def main() -> None:
+    producer = get_rabbit_producer()
+    await producer.connect()
+
+    logger.info("Reaper started.")
+    try:
+        await run_reaper(producer)
+    finally:
+        await producer.close()
+        await shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
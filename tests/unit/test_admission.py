@@ -0,0 +1,102 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.admission import AdmissionController, TokenBucket
+from app.middlewares import admission_middleware
+
+
+def test_token_bucket_allows_burst_then_asks_to_wait():
+    bucket = TokenBucket(rate=1.0, burst=2)
+
+    assert bucket.take("client", now=0.0) == 0
+    assert bucket.take("client", now=0.0) == 0
+    assert bucket.take("client", now=0.0) == pytest.approx(1.0)
+    # Отказ не тратит токен: через секунду он появляется.
+    assert bucket.take("client", now=1.0) == 0
+    assert bucket.take("other", now=1.0) == 0
+
+
+def test_token_bucket_evicts_least_recent_client():
+    bucket = TokenBucket(rate=1.0, burst=1, max_clients=2)
+
+    bucket.take("a", now=0.0)
+    bucket.take("b", now=0.0)
+    bucket.take("c", now=0.0)
+
+    assert list(bucket.buckets) == ["b", "c"]
+
+
+@pytest.fixture
+def controller():
+    with patch("app.admission.settings") as mock_settings:
+        mock_settings.ADMISSION_MAX_QUEUE_DEPTH = 100
+        mock_settings.ADMISSION_MAX_POOL_USAGE = 0.9
+        mock_settings.ADMISSION_MIN_FREE_DISK_MB = 1
+        mock_settings.ADMISSION_RETRY_AFTER = 7
+        mock_settings.ADMISSION_REFRESH_INTERVAL = 1.0
+        mock_settings.UPLOAD_RATE_LIMIT = 0
+        yield AdmissionController()
+
+
+def test_check_sheds_load_on_queue_depth_and_pool(controller):
+    with patch("app.admission.pool_usage", return_value=0.1):
+        assert controller.check("client") is None
+
+        controller.queue_depth = 100
+        rejection = controller.check("client")
+        assert rejection.status_code == 503
+        assert rejection.retry_after == 7
+        assert rejection.reason == "queue_depth"
+
+    controller.queue_depth = 0
+    with patch("app.admission.pool_usage", return_value=0.95):
+        assert controller.check("client").reason == "db_pool"
+
+
+@pytest.mark.asyncio
+async def test_refresh_treats_unavailable_queue_as_unknown(
+        controller, tmp_path
+):
+    queue = AsyncMock()
+    queue.queue_depth.side_effect = RuntimeError("broker down")
+    controller.queue_depth = 500
+
+    with patch("app.admission.get_job_queue", return_value=queue), \
+         patch("app.admission.settings") as mock_settings, \
+         patch("app.admission.pool_usage", return_value=0.0):
+        mock_settings.PATH_TO_IMAGE = str(tmp_path)
+        await controller.refresh()
+
+        assert controller.queue_depth is None
+        assert controller.free_disk > 0
+        assert controller.check("client") is None
+
+
+def test_middleware_rejects_with_retry_after_only_on_upload():
+    app = FastAPI()
+    app.middleware("http")(admission_middleware)
+
+    @app.post("/image")
+    async def upload():
+        return {"status": "ok"}
+
+    @app.get("/image_info/{id}")
+    async def image_info(id: str):
+        return {"id": id}
+
+    controller = AdmissionController()
+    controller.rate_limiter = TokenBucket(rate=0.5, burst=1)
+    client = TestClient(app)
+
+    with patch(
+        "app.middlewares.get_admission_controller",
+        return_value=controller,
+    ), patch("app.admission.pool_usage", return_value=0.0):
+        assert client.post("/image").status_code == 200
+        response = client.post("/image")
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "2"
+        assert client.get("/image_info/1").status_code == 200
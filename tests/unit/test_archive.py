@@ -0,0 +1,70 @@
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.repositories.partition_repository import check_partition_name
+from app.services.archive_service import ArchiveService, move_image_files
+from app.services.partition_service import ensure_partitions
+
+
+def test_move_image_files_skips_missing(tmp_path):
+    source, target = tmp_path / "images", tmp_path / "archive"
+    source.mkdir()
+    target.mkdir()
+    image_id = uuid.uuid4()
+    (source / str(image_id)).write_bytes(b"original")
+    (source / f"{image_id}_100.jpg").write_bytes(b"thumb")
+
+    moved = move_image_files([image_id], source, target, [100, 300])
+
+    assert moved == 2
+    assert (target / str(image_id)).read_bytes() == b"original"
+    assert (target / f"{image_id}_100.jpg").exists()
+    assert not any(source.iterdir())
+
+
+def test_check_partition_name_rejects_other_tables():
+    assert check_partition_name("images_p202401") == "images_p202401"
+    with pytest.raises(ValueError):
+        check_partition_name("images; DROP TABLE images")
+
+
+@pytest.mark.asyncio
+async def test_archive_partition_walks_ids_in_batches(tmp_path):
+    ids = sorted(uuid.uuid4() for _ in range(3))
+    repository = AsyncMock()
+    repository.partition_ids.side_effect = [ids[:2], ids[2:], []]
+
+    with patch(
+        "app.services.archive_service.PartitionRepository",
+        return_value=repository,
+    ), patch("app.services.archive_service.settings") as mock_settings:
+        mock_settings.PATH_TO_IMAGE = str(tmp_path)
+        mock_settings.THUMBNAILS_RESOLUTION = [100]
+        service = ArchiveService(AsyncMock(), tmp_path / "archive", 2)
+        await service.archive_partition("images_p202401")
+
+    after = [c.args[1] for c in repository.partition_ids.await_args_list]
+    assert after == [None, ids[1], ids[2]]
+    repository.detach_partition.assert_awaited_once_with("images_p202401")
+    repository.export_partition.assert_awaited_once_with(
+        "images_p202401",
+        tmp_path / "archive" / "images_p202401" / "images.csv",
+    )
+    repository.drop_partition.assert_awaited_once_with("images_p202401")
+
+
+@pytest.mark.asyncio
+async def test_ensure_partitions_does_not_block_startup():
+    repository = AsyncMock()
+    repository.create_partitions.return_value = 2
+    with patch("app.services.partition_service.session_gen", MagicMock()), \
+            patch(
+                "app.services.partition_service.PartitionRepository",
+                return_value=repository,
+            ):
+        assert await ensure_partitions() == 2
+
+        repository.create_partitions.side_effect = RuntimeError("db down")
+        assert await ensure_partitions() == 0
@@ -0,0 +1,68 @@
+from pathlib import Path
+from unittest.mock import patch
+
+from PIL import Image as PILImage
+
+from app.thumbnails import render_thumbnails
+from backfill import Checkpoint, missing_renditions
+
+
+def test_missing_renditions_skips_existing(tmp_path: Path):
+    (tmp_path / "abc_100.jpg").write_bytes(b"data")
+
+    with patch("backfill.settings") as mock_settings:
+        mock_settings.PATH_TO_IMAGE = tmp_path
+        result = missing_renditions("abc", [100, 300])
+
+    assert result == [(tmp_path / "abc_300.jpg", 300)]
+
+
+def test_render_thumbnails_creates_all_targets(tmp_path: Path):
+    original = tmp_path / "original"
+    with PILImage.new("RGB", (400, 200), color="blue") as img:
+        img.save(original, "PNG")
+    targets = [(tmp_path / "t_100.jpg", 100), (tmp_path / "t_50.jpg", 50)]
+
+    created = render_thumbnails(original, targets)
+
+    assert created == 2
+    with PILImage.open(tmp_path / "t_50.jpg") as img:
+        assert img.size == (50, 25)
+
+
+def test_checkpoint_advances_only_past_contiguous_done(tmp_path: Path):
+    path = tmp_path / "backfill.ckpt"
+    checkpoint = Checkpoint(path)
+    for image_id in ("a", "b", "c"):
+        checkpoint.started(image_id)
+
+    checkpoint.finished("b")
+    assert checkpoint.last_id is None
+
+    checkpoint.finished("a")
+    assert checkpoint.last_id == "b"
+
+    checkpoint.save()
+    assert Checkpoint(path).last_id == "b"
+
+
+def test_checkpoint_holds_watermark_before_failed_id(tmp_path: Path):
+    path = tmp_path / "backfill.ckpt"
+    checkpoint = Checkpoint(path)
+    for image_id in ("a", "b", "c"):
+        checkpoint.started(image_id)
+
+    checkpoint.finished("a")
+    checkpoint.failed("b")
+    checkpoint.finished("c")
+    assert checkpoint.last_id == "a"
+
+    checkpoint.save()
+    resumed = Checkpoint(path)
+    assert resumed.last_id == "a"
+    assert resumed.failed_ids == {"b"}
+
+    # Повтор при возобновлении удачен — id больше не в списке.
+    resumed.started("b")
+    resumed.finished("b")
+    assert resumed.failed_ids == set()
@@ -0,0 +1,45 @@
+import io
+import os
+import zipfile
+
+import pytest
+
+from app.bulk_download import DownloadFile, multipart_stream, zip_stream
+
+
+@pytest.fixture
+def files(tmp_path):
+    result = []
+    for name, size in (("a_100.jpg", 0), ("b_100.jpg", 700 * 1024)):
+        path = tmp_path / name
+        path.write_bytes(os.urandom(size))
+        result.append(DownloadFile(name, path, size))
+    return result
+
+
+@pytest.mark.asyncio
+async def test_zip_stream_is_valid_stored_archive(files):
+    chunks = [chunk async for chunk in zip_stream(files)]
+
+    # Архив отдаётся по частям, а не одним буфером в конце.
+    assert len(chunks) > len(files)
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as archive:
+        assert archive.testzip() is None
+        for file in files:
+            info = archive.getinfo(file.name)
+            assert info.compress_type == zipfile.ZIP_STORED
+            assert archive.read(file.name) == file.path.read_bytes()
+
+
+@pytest.mark.asyncio
+async def test_multipart_stream_frames_each_file(files):
+    body = b"".join([
+        chunk
+        async for chunk in multipart_stream(files, "xyz", "image/jpeg")
+    ])
+
+    parts = body.split(b"--xyz")
+    assert parts[-1] == b"--\r\n"
+    headers, content = parts[2].split(b"\r\n\r\n", 1)
+    assert b'filename="b_100.jpg"' in headers
+    assert content[:-2] == files[1].path.read_bytes()
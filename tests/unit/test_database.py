@@ -0,0 +1,62 @@
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.database import initialize_db
+
+
+@pytest.mark.asyncio
+async def test_initialize_db_opens_prewarm_connections_at_once():
+    opened = []
+    open_now = 0
+
+    @asynccontextmanager
+    async def connect():
+        nonlocal open_now
+        open_now += 1
+        opened.append(open_now)
+        try:
+            yield AsyncMock()
+        finally:
+            open_now -= 1
+
+    engine = MagicMock()
+    engine.connect = connect
+    with patch("app.database.get_engine", return_value=engine), \
+            patch("app.database.replica_engines", []), \
+            patch("app.database.settings") as mock_settings:
+        mock_settings.POOL_PREWARM = 10
+        mock_settings.POOL_SIZE = 3
+        await initialize_db()
+
+    # Не больше размера пула, и все соединения открыты одновременно.
+    assert len(opened) == 3
+    assert max(opened) == 3
+    assert open_now == 0
+
+
+@pytest.mark.asyncio
+async def test_initialize_db_checks_replicas_without_prewarm():
+    def engine_counting(counts, name):
+        @asynccontextmanager
+        async def connect():
+            counts[name] += 1
+            yield AsyncMock()
+
+        engine = MagicMock()
+        engine.connect = connect
+        return engine
+
+    counts = {"primary": 0, "replica": 0}
+    primary = engine_counting(counts, "primary")
+    replica = engine_counting(counts, "replica")
+    with patch("app.database.get_engine", return_value=primary), \
+            patch("app.database.replica_engines", [replica]), \
+            patch("app.database.settings") as mock_settings:
+        mock_settings.POOL_PREWARM = 0
+        mock_settings.POOL_SIZE = 5
+        mock_settings.REPLICA_POOL_SIZE = 5
+        await initialize_db()
+
+    assert counts == {"primary": 1, "replica": 1}
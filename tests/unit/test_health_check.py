@@ -0,0 +1,83 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.services.health_check_service import HealthCheckService
+
+
+@pytest.fixture
+def service():
+    with patch("app.services.health_check_service.settings") as mock_settings:
+        mock_settings.HEALTH_CHECK_INTERVAL = 5.0
+        mock_settings.HEALTH_CHECK_TIMEOUT = 0.05
+        mock_settings.HEALTH_CHECK_TTL = 15.0
+        mock_settings.QUEUE_BACKEND = "rabbitmq"
+        service = HealthCheckService()
+        service.check_db = AsyncMock()
+        yield service
+
+
+def queue_with_depth(depth):
+    queue = AsyncMock()
+    queue.queue_depth.return_value = depth
+    return queue
+
+
+def test_not_ready_before_first_check(service):
+    ready, report = service.readiness()
+
+    assert not ready
+    assert report["checked_ago_s"] is None
+
+
+@pytest.mark.asyncio
+async def test_ready_reports_queue_depth(service):
+    with patch(
+        "app.services.health_check_service.get_job_queue",
+        return_value=queue_with_depth(42),
+    ):
+        await service.refresh()
+
+    ready, report = service.readiness()
+
+    assert ready
+    assert report["checks"]["queue"]["depth"] == 42
+    assert report["checks"]["queue"]["backend"] == "rabbitmq"
+    assert "usage" in report["db_pool"]
+
+
+@pytest.mark.asyncio
+async def test_hanging_queue_times_out(service):
+    async def hang():
+        await asyncio.sleep(10)
+
+    queue = AsyncMock()
+    queue.queue_depth.side_effect = hang
+    with patch(
+        "app.services.health_check_service.get_job_queue",
+        return_value=queue,
+    ):
+        await service.refresh()
+
+    ready, report = service.readiness()
+
+    assert not ready
+    assert report["checks"]["queue"]["status"] == "error"
+    assert "timeout" in report["checks"]["queue"]["error"]
+    assert report["checks"]["db"]["status"] == "ok"
+
+
+@pytest.mark.asyncio
+async def test_stale_result_is_not_ready(service):
+    with patch(
+        "app.services.health_check_service.get_job_queue",
+        return_value=queue_with_depth(0),
+    ):
+        await service.refresh()
+    service.checked_at -= 60
+
+    ready, report = service.readiness()
+
+    assert not ready
+    assert report["status"] == "not_ready"
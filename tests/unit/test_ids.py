@@ -0,0 +1,51 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from app.ids import created_at_window, uuid7, uuid7_time
+from app.repositories.image_repository import image_id_filter, image_ids_filter
+
+
+def test_uuid7_is_version_7_and_time_ordered():
+    ids = [uuid7() for _ in range(10000)]
+
+    assert all(i.version == 7 for i in ids)
+    assert all(i.variant == uuid.RFC_4122 for i in ids)
+    # Монотонен и внутри одной миллисекунды.
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+
+
+def test_uuid7_time_matches_clock():
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+
+    created = uuid7_time(uuid7())
+
+    assert abs(created - now) < timedelta(seconds=1)
+    assert uuid7_time(uuid.uuid4()) is None
+
+
+def test_image_id_filter_adds_created_at_window_only_for_v7():
+    v7 = uuid7()
+    low, high = created_at_window(v7)
+
+    params = image_id_filter(str(v7)).compile().params
+    assert set(params.values()) == {str(v7), low, high}
+
+    assert image_id_filter(str(uuid.uuid4())).compile().params.keys() == {
+        "id_1"
+    }
+    assert image_id_filter("not-a-uuid").compile().params == {
+        "id_1": "not-a-uuid"
+    }
+
+
+def test_image_ids_filter_bounds_v7_ids_and_keeps_others():
+    v7 = [uuid7(), uuid7()]
+    v4 = uuid.uuid4()
+    low, _ = created_at_window(v7[0])
+    _, high = created_at_window(v7[1])
+
+    params = image_ids_filter([*v7, v4]).compile().params
+
+    assert list(params.values()) == [v7, low, high, [v4]]
+    assert list(image_ids_filter([v4]).compile().params.values()) == [[v4]]
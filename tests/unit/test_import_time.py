@@ -0,0 +1,46 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+# С запасом на медленный CI: локально app.app ~0.8 с, worker ~0.5 с.
+IMPORT_BUDGET_S = 2.5
+
+
+def import_time(module: str) -> tuple[float, set[str]]:
+    """Суммарное время импорта module и все импортированные им модули."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total_us = 0
+    imported = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        imported.add(name.strip())
+        if name.strip() == module:
+            total_us = int(cumulative)
+    return total_us / 1e6, imported
+
+
+@pytest.mark.parametrize(
+    "module, lazy",
+    [
+        # Драйвер БД — при создании движка в lifespan, aio_pika — при
+        # выборе бэкенда очереди.
+        ("app.app", {"asyncpg", "aio_pika"}),
+        ("worker", {"asyncpg", "fastapi"}),
+    ],
+)
+def test_import_time_budget(module, lazy):
+    total, imported = import_time(module)
+
+    assert total < IMPORT_BUDGET_S
+    assert not lazy & imported
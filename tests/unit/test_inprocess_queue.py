@@ -0,0 +1,55 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.inprocess_queue import InProcessQueue
+from worker import LANE_INPROCESS
+
+
+@pytest.mark.asyncio
+async def test_send_message_requires_connect():
+    queue = InProcessQueue("images", concurrency=1, processes=1)
+
+    with pytest.raises(RuntimeError):
+        await queue.send_message({"image_id": "abc"})
+
+
+@pytest.mark.asyncio
+async def test_jobs_run_through_worker_with_process_pool():
+    queue = InProcessQueue("images", concurrency=2, processes=1)
+
+    with patch("worker.run_job", AsyncMock()) as mock_run_job:
+        await queue.connect()
+        try:
+            await queue.send_message({"image_id": "abc"})
+            await queue.queue.join()
+        finally:
+            executor = queue.executor
+            await queue.close()
+
+    image_id, lane, published_at, traceparent, job_executor = (
+        mock_run_job.await_args.args
+    )
+    assert (image_id, lane) == ("abc", LANE_INPROCESS)
+    assert isinstance(published_at, float)
+    assert job_executor is executor
+    assert queue.consumers == []
+
+
+@pytest.mark.asyncio
+async def test_failed_job_does_not_stop_consumer():
+    queue = InProcessQueue("images", concurrency=1, processes=1)
+
+    with patch(
+        "worker.run_job",
+        AsyncMock(side_effect=[RuntimeError("boom"), None]),
+    ) as mock_run_job:
+        await queue.connect()
+        try:
+            await queue.send_message({"image_id": "first"})
+            await queue.send_message({"image_id": "second"})
+            await queue.queue.join()
+        finally:
+            await queue.close()
+
+    assert mock_run_job.await_count == 2
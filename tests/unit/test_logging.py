@@ -0,0 +1,99 @@
+import gc
+import io
+import json
+import logging
+import queue
+import weakref
+
+import pytest
+
+from app.logging.logging import setup_logging
+from app.logging.queued import NonBlockingQueueHandler, attach_queued
+from app.tracing import trace_context
+
+
+@pytest.fixture
+def log_stream():
+    stream = io.StringIO()
+    yield stream
+    setup_logging()
+
+
+def flush_records(stream: io.StringIO) -> list[dict]:
+    # Остановка слушателя дописывает очередь в поток.
+    for handler in logging.getLogger().handlers:
+        handler.close()
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_setup_logging_writes_json_with_trace_fields(log_stream):
+    setup_logging("INFO", sample_rate=1.0, stream=log_stream)
+    logger = logging.getLogger("test")
+
+    with trace_context() as trace_id:
+        logger.info("Processing image %s", "abc")
+    try:
+        raise ValueError("boom")
+    except ValueError as e:
+        logger.error("Failed", exc_info=e)
+
+    info, error = flush_records(log_stream)
+    assert info["message"] == "Processing image abc"
+    assert info["trace_id"] == trace_id
+    assert error["message"] == "Failed"
+    assert "ValueError: boom" in error["exc_info"]
+
+
+def test_sampling_keeps_warnings(log_stream):
+    setup_logging("INFO", sample_rate=0.0, stream=log_stream)
+    logger = logging.getLogger("test")
+
+    logger.info("dropped")
+    logger.warning("kept")
+
+    records = flush_records(log_stream)
+    assert [r["message"] for r in records] == ["kept"]
+
+
+def test_full_queue_drops_info_records():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    logger = logging.getLogger("test.queue")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+
+    logger.warning("first")
+    logger.info("second")
+
+    assert handler.dropped == 1
+    logger.removeHandler(handler)
+
+
+def test_full_queue_drops_warning_after_timeout():
+    handler = NonBlockingQueueHandler(
+        queue.Queue(maxsize=1),
+        warning_timeout=0.01,
+    )
+    logger = logging.getLogger("test.queue.warning")
+    logger.propagate = False
+    logger.addHandler(handler)
+
+    logger.warning("first")
+    logger.error("second")
+
+    assert handler.dropped == 1
+    logger.removeHandler(handler)
+
+
+def test_replaced_queue_handler_is_released():
+    logger = logging.getLogger("test.queue.replace")
+    logger.propagate = False
+    old = weakref.ref(attach_queued(logger, logging.NullHandler(), 10))
+
+    current = attach_queued(logger, logging.NullHandler(), 10)
+    gc.collect()
+
+    # Закрытый хендлер снят с atexit и не держится в памяти.
+    assert old() is None
+    current.close()
+    logger.removeHandler(current)
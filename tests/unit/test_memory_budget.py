@@ -0,0 +1,30 @@
+import asyncio
+
+import pytest
+
+from app.memory_budget import MemoryBudget
+
+
+@pytest.mark.asyncio
+async def test_reserve_waits_until_budget_is_released():
+    budget = MemoryBudget(100)
+    order = []
+
+    async def job(name: str, amount: int, hold: float):
+        async with budget.reserve(amount):
+            order.append(f"{name} start")
+            await asyncio.sleep(hold)
+        order.append(f"{name} end")
+
+    await asyncio.gather(job("a", 70, 0.02), job("b", 50, 0))
+
+    assert order == ["a start", "a end", "b start", "b end"]
+    assert budget.used == 0
+
+
+@pytest.mark.asyncio
+async def test_reserve_clamps_oversized_job_to_total():
+    budget = MemoryBudget(100)
+
+    async with budget.reserve(1000):
+        assert budget.used == 100
@@ -0,0 +1,45 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.middlewares import metrics_middleware
+from app.routers.metrics_router import metrics_router
+
+
+def make_client() -> TestClient:
+    app = FastAPI()
+    app.middleware("http")(metrics_middleware)
+    app.include_router(metrics_router)
+
+    @app.get("/image_info/{id}")
+    async def image_info(id: str):
+        return {"id": id}
+
+    return TestClient(app)
+
+
+def test_request_duration_is_labeled_by_route_template():
+    client = make_client()
+    labels = {"method": "GET", "route": "/image_info/{id}", "status": "200"}
+    before = REGISTRY.get_sample_value(
+        "http_request_duration_seconds_count", labels
+    ) or 0
+
+    client.get("/image_info/first")
+    client.get("/image_info/second")
+
+    after = REGISTRY.get_sample_value(
+        "http_request_duration_seconds_count", labels
+    )
+    assert after == before + 2
+
+
+def test_metrics_endpoint_exposes_prometheus_text():
+    client = make_client()
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "http_request_duration_seconds" in response.text
+    assert "db_pool_checkout_wait_seconds" in response.text
@@ -0,0 +1,58 @@
+import os
+import time
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from orphan_gc import PART, TEMP, THUMBNAIL, classify, collect
+
+
+def test_classify_recognises_storage_names():
+    image_id = uuid.uuid4()
+
+    assert classify(str(image_id)) == (image_id, "original")
+    assert classify(f"{image_id}_300.jpg") == (image_id, THUMBNAIL)
+    assert classify(f"{image_id}.part") == (image_id, PART)
+    assert classify(f"{image_id}_300.jpg.tmp") == (image_id, TEMP)
+    assert classify(f"{image_id}_300.jpg.{'a' * 32}.tmp") == (image_id, TEMP)
+    assert classify(f"{image_id}.tmp") is None
+    assert classify("README") is None
+
+
+@pytest.mark.asyncio
+async def test_collect_quarantines_only_old_orphans(tmp_path):
+    storage, quarantine = tmp_path / "images", tmp_path / "quarantine"
+    storage.mkdir()
+    quarantine.mkdir()
+    live, dead, upload = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    old = time.time() - 7200
+    # Брошенная запись миниатюры живого изображения — тоже мусор.
+    stale_tmp = f"{live}_300.jpg.{'b' * 32}.tmp"
+    for name in (str(live), f"{live}_100.jpg", f"{dead}_100.jpg",
+                 f"{upload}.part", stale_tmp, "notes.txt"):
+        (storage / name).write_bytes(b"data")
+        os.utime(storage / name, (old, old))
+    # Свежий файл без строки — загрузка, которая ещё не закоммичена.
+    young = uuid.uuid4()
+    (storage / str(young)).write_bytes(b"data")
+
+    image_repository = AsyncMock()
+    image_repository.existing_ids.return_value = {live}
+    upload_repository = AsyncMock()
+    upload_repository.existing_ids.return_value = set()
+
+    with patch("orphan_gc.session_gen", MagicMock()), \
+            patch("orphan_gc.ImageRepository", return_value=image_repository), \
+            patch("orphan_gc.UploadRepository",
+                  return_value=upload_repository):
+        stats = await collect(storage, False, quarantine, 3600, 2, None)
+
+    assert sorted(p.name for p in quarantine.iterdir()) == sorted(
+        [f"{dead}_100.jpg", f"{upload}.part", stale_tmp]
+    )
+    assert (storage / str(live)).exists()
+    assert (storage / str(young)).exists()
+    assert stats["orphans"] == 3
+    assert stats["skipped_young"] == 1
+    assert stats["skipped_unknown"] == 1
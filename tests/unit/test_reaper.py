@@ -0,0 +1,72 @@
+import uuid
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.services.reaper_service import ReaperService
+
+
+@pytest.fixture
+def mock_repository():
+    repo = AsyncMock()
+    return repo
+
+
+@pytest.fixture
+def reaper(mock_repository, mock_producer):
+    with patch(
+        "app.services.reaper_service.ImageRepository",
+        return_value=mock_repository,
+    ):
+        service = ReaperService(session=AsyncMock(), producer=mock_producer)
+    service.batch_size = 2
+    return service
+
+
+@pytest.mark.asyncio
+async def test_requeue_stale_batch_sends_claimed_ids(
+    reaper, mock_repository, mock_producer
+):
+    ids = [uuid.uuid4(), uuid.uuid4()]
+    mock_repository.claim_stale_images.return_value = ids
+
+    result = await reaper.requeue_stale_batch()
+
+    assert result == 2
+    mock_repository.claim_stale_images.assert_awaited_once_with(
+        reaper.stale_after, 2
+    )
+    sent = [c.args[0] for c in mock_producer.send_message.await_args_list]
+    assert sent == [{"image_id": str(i)} for i in ids]
+
+
+@pytest.mark.asyncio
+async def test_requeue_stale_drains_until_partial_batch(
+    reaper, mock_repository, mock_producer
+):
+    mock_repository.claim_stale_images.side_effect = [
+        [uuid.uuid4(), uuid.uuid4()],
+        [uuid.uuid4()],
+    ]
+
+    result = await reaper.requeue_stale()
+
+    assert result == 3
+    assert mock_repository.claim_stale_images.await_count == 2
+    assert mock_producer.send_message.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_purge_expired_uploads_removes_part_files(reaper, tmp_path):
+    ids = [uuid.uuid4(), uuid.uuid4(), uuid.uuid4()]
+    for upload_id in ids[:2]:
+        (tmp_path / f"{upload_id}.part").write_bytes(b"partial")
+    reaper.upload_repository = AsyncMock()
+    reaper.upload_repository.delete_expired.side_effect = [ids[:2], ids[2:]]
+
+    with patch("app.services.upload_service.settings") as mock_settings:
+        mock_settings.PATH_TO_IMAGE = str(tmp_path)
+        purged = await reaper.purge_expired_uploads()
+
+    assert purged == 3
+    assert list(tmp_path.iterdir()) == []
@@ -57,3 +57,19 @@ async def test_get_image_by_id_returns_schema(mock_session):
     assert result.original_filename == "test.png"
     assert result.status == ImageStatus.NEW
     mock_session.execute.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_claim_stale_images_returns_ids_and_commits(mock_session):
+    repo = ImageRepository(mock_session)
+
+    ids = [uuid.uuid4(), uuid.uuid4()]
+    mock_result = MagicMock()
+    mock_result.scalars.return_value.all.return_value = ids
+    mock_session.execute = AsyncMock(return_value=mock_result)
+
+    result = await repo.claim_stale_images(datetime.timedelta(minutes=10), 50)
+
+    assert result == ids
+    mock_session.execute.assert_awaited_once()
+    mock_session.commit.assert_awaited_once()
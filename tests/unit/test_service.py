@@ -6,11 +6,14 @@ from unittest.mock import AsyncMock, MagicMock, mock_open, patch
 
 import pytest
 from fastapi import UploadFile
+from PIL import Image as PILImage
 from starlette.datastructures import Headers
 from starlette.responses import FileResponse
 
-from app.exceptions import (FileTooBig, ImageNotProcessedYetError,
-                            ImageSaveWithError, NotAllowedContentType)
+from app.exceptions import (FileTooBig, ImageNotFound,
+                            ImageNotProcessedYetError, ImageSaveWithError,
+                            ImageTooManyPixels, InvalidImage,
+                            NotAllowedContentType)
 from app.models import ImageStatus
 from app.schemas.image_schemas import ImageSchema
 from app.services.image_service import ImageService
@@ -22,6 +25,12 @@ def mock_repository():
     return repo
 
 
+def make_png(width: int = 20, height: int = 10) -> bytes:
+    buffer = io.BytesIO()
+    PILImage.new("RGB", (width, height), color="red").save(buffer, "PNG")
+    return buffer.getvalue()
+
+
 @pytest.fixture
 def service(mock_repository):
     with patch("app.services.image_service.ImageRepository", return_value=mock_repository):
@@ -41,7 +50,7 @@ async def test_upload_image_success(service, mock_repository, tmp_path):
     mock_repository.add_image.return_value = fake_schema
     headers = Headers({"content-type": "image/png"})
 
-    file_content = b"fake_image_data" * 10
+    file_content = make_png()
     upload = UploadFile(filename="test.png", headers=headers, file=io.BytesIO(file_content))
     upload.size = len(file_content)
 
@@ -61,6 +70,10 @@ async def test_upload_image_success(service, mock_repository, tmp_path):
     assert isinstance(result, ImageSchema)
     assert result.id == fake_id
     mock_repository.add_image.assert_awaited_once()
+    metadata = mock_repository.add_image.await_args.args[2]
+    assert (metadata.width, metadata.height) == (20, 10)
+    assert metadata.format == "PNG"
+    assert metadata.size_bytes == len(file_content)
 
 
 @pytest.mark.asyncio
@@ -83,6 +96,34 @@ async def test_upload_image_too_big(service):
         await service.upload_image(upload)
 
 
+@pytest.mark.asyncio
+async def test_upload_image_rejects_unreadable_file(service, mock_repository):
+    headers = Headers({"content-type": "image/png"})
+    upload = UploadFile(
+        filename="bad.png", headers=headers, file=io.BytesIO(b"not an image")
+    )
+    upload.size = 12
+
+    with pytest.raises(InvalidImage):
+        await service.upload_image(upload)
+    mock_repository.add_image.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_upload_image_rejects_too_many_pixels(service, mock_repository):
+    headers = Headers({"content-type": "image/png"})
+    file_content = make_png(100, 100)
+    upload = UploadFile(
+        filename="big.png", headers=headers, file=io.BytesIO(file_content)
+    )
+    upload.size = len(file_content)
+    service.max_pixels = 100 * 100 - 1
+
+    with pytest.raises(ImageTooManyPixels):
+        await service.upload_image(upload)
+    mock_repository.add_image.assert_not_awaited()
+
+
 @pytest.mark.asyncio
 async def test_get_image_info_returns_schema(service, mock_repository):
     fake_id = uuid.uuid4()
@@ -151,3 +192,110 @@ async def test_get_image_raises_if_processing(service, mock_repository):
 
     with pytest.raises(ImageNotProcessedYetError):
         await service.get_image(str(fake_schema.id), 100)
+
+
+@pytest.mark.asyncio
+async def test_get_image_info_falls_back_to_primary_when_replica_lags():
+    fake_schema = ImageSchema(
+        id=uuid.uuid4(),
+        status=ImageStatus.DONE,
+        original_filename="x.png",
+        content_type="image/png",
+        created_at=datetime.datetime.now(),
+    )
+    replica_repository, primary_repository = AsyncMock(), AsyncMock()
+    replica_repository.get_image_by_id.side_effect = ImageNotFound
+    primary_repository.get_image_by_id.return_value = fake_schema
+
+    with patch(
+        "app.services.image_service.ImageRepository",
+        side_effect=[replica_repository, primary_repository],
+    ), patch("app.services.image_service.is_replica", return_value=True), \
+            patch("app.services.image_service.session_gen", MagicMock()):
+        service = ImageService(session=AsyncMock())
+        result = await service.get_image_info(str(fake_schema.id))
+
+    assert result == fake_schema
+    primary_repository.get_image_by_id.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_get_image_info_trusts_replica_for_final_status(mock_repository):
+    fake_schema = ImageSchema(
+        id=uuid.uuid4(),
+        status=ImageStatus.DONE,
+        original_filename="x.png",
+        content_type="image/png",
+        created_at=datetime.datetime.now(),
+    )
+    mock_repository.get_image_by_id.return_value = fake_schema
+
+    with patch(
+        "app.services.image_service.ImageRepository",
+        return_value=mock_repository,
+    ) as repository_cls, \
+            patch("app.services.image_service.is_replica", return_value=True):
+        service = ImageService(session=AsyncMock())
+        result = await service.get_image_info(str(fake_schema.id))
+
+    assert result == fake_schema
+    repository_cls.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_get_thumbnails_checks_all_statuses_at_once(
+    service, mock_repository
+):
+    done, pending = uuid.uuid4(), uuid.uuid4()
+    mock_repository.get_images_by_ids.return_value = [
+        ImageSchema(
+            id=id,
+            status=status,
+            original_filename="x.png",
+            content_type="image/png",
+            created_at=datetime.datetime.now(),
+        )
+        for id, status in (
+            (done, ImageStatus.DONE),
+            (pending, ImageStatus.PROCESSING),
+        )
+    ]
+
+    with pytest.raises(ImageNotProcessedYetError) as exc_info:
+        await service.get_thumbnails([done, pending, done], 100)
+
+    assert exc_info.value.args[0] == [pending]
+    mock_repository.get_images_by_ids.assert_awaited_once_with(
+        [done, pending]
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_thumbnails_reports_missing_files(
+    service, mock_repository, tmp_path
+):
+    present, lost = uuid.uuid4(), uuid.uuid4()
+    mock_repository.get_images_by_ids.return_value = [
+        ImageSchema(
+            id=id,
+            status=ImageStatus.DONE,
+            original_filename="x.png",
+            content_type="image/png",
+            created_at=datetime.datetime.now(),
+        )
+        for id in (present, lost)
+    ]
+    (tmp_path / f"{present}_100.jpg").write_bytes(b"jpeg")
+
+    with patch("app.services.image_service.settings") as mock_settings:
+        mock_settings.PATH_TO_IMAGE = str(tmp_path)
+        with pytest.raises(ImageNotFound) as exc_info:
+            await service.get_thumbnails([present, lost], 100)
+        (tmp_path / f"{lost}_100.jpg").write_bytes(b"jpeg!")
+        files = await service.get_thumbnails([present, lost], 100)
+
+    assert exc_info.value.args[0] == [lost]
+    assert [(f.name, f.size) for f in files] == [
+        (f"{present}_100.jpg", 4),
+        (f"{lost}_100.jpg", 5),
+    ]
@@ -0,0 +1,66 @@
+import json
+import logging
+
+import pytest
+
+from app.logging.logging import TraceContextFilter
+from app.tracing import (current_traceparent, setup_tracing, span,
+                         trace_context, trace_id_var)
+
+
+@pytest.fixture
+def span_file(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    setup_tracing(str(path))
+    yield path
+    setup_tracing(None)
+
+
+def read_spans(path):
+    # Спаны пишутся в фоновом потоке: остановка слушателя дописывает
+    # очередь в файл.
+    setup_tracing(None)
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_nested_spans_are_exported_with_parent(span_file):
+    with trace_context() as trace_id:
+        with span("outer"):
+            with span("inner", resolution=100):
+                pass
+
+    inner, outer = read_spans(span_file)
+    assert inner["traceId"] == outer["traceId"] == trace_id
+    assert inner["parentSpanId"] == outer["spanId"]
+    assert inner["attributes"] == [
+        {"key": "resolution", "value": {"stringValue": "100"}}
+    ]
+    assert inner["startTimeUnixNano"] <= inner["endTimeUnixNano"]
+
+
+def test_trace_context_continues_incoming_traceparent():
+    incoming = "00-" + "a" * 32 + "-" + "b" * 16 + "-01"
+
+    with trace_context(incoming) as trace_id:
+        traceparent = current_traceparent()
+
+    assert trace_id == "a" * 32
+    assert traceparent == incoming
+    assert trace_id_var.get() is None
+
+
+def test_span_without_trace_is_not_exported(span_file):
+    with span("orphan"):
+        pass
+
+    assert read_spans(span_file) == []
+
+
+def test_log_filter_adds_trace_fields():
+    record = logging.LogRecord("x", logging.INFO, "", 0, "msg", None, None)
+
+    with trace_context() as trace_id, span("work"):
+        TraceContextFilter().filter(record)
+
+    assert record.trace_id == trace_id
+    assert record.span_id is not None
@@ -0,0 +1,221 @@
+import asyncio
+import datetime
+import io
+import uuid
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from PIL import Image as PILImage
+
+from app.exceptions import FileTooBig, UploadIncomplete, UploadOffsetMismatch
+from app.models import ImageStatus
+from app.schemas.image_schemas import ImageSchema
+from app.schemas.upload_schemas import UploadSessionSchema
+from app.services.upload_service import UploadService, part_path
+
+
+def make_png() -> bytes:
+    buffer = io.BytesIO()
+    PILImage.new("RGB", (20, 10), color="red").save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def make_upload(size: int, offset: int = 0, image_id=None):
+    return UploadSessionSchema(
+        id=uuid.uuid4(),
+        original_filename="big.png",
+        content_type="image/png",
+        size_bytes=size,
+        offset=offset,
+        expires_at=datetime.datetime.now(),
+        image_id=image_id,
+    )
+
+
+async def chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+async def broken_stream(*parts: bytes):
+    for part in parts:
+        yield part
+    raise ConnectionError("client went away")
+
+
+def advance(upload, new_offset, ttl):
+    return upload.model_copy(update={"offset": new_offset})
+
+
+@pytest.fixture
+def storage(tmp_path):
+    with patch("app.services.upload_service.settings") as mock_settings:
+        mock_settings.PATH_TO_IMAGE = str(tmp_path)
+        mock_settings.MAX_IMAGE_PIXELS = 1000
+        mock_settings.UPLOAD_SESSION_TTL = 60
+        yield tmp_path
+
+
+@pytest.fixture
+def mock_repository():
+    repo = AsyncMock()
+    repo.advance_offset.side_effect = advance
+    return repo
+
+
+@pytest.fixture
+def service(storage, mock_repository):
+    with patch(
+        "app.services.upload_service.UploadRepository",
+        return_value=mock_repository,
+    ):
+        yield UploadService(session=AsyncMock())
+
+
+@pytest.mark.asyncio
+async def test_append_chunk_overwrites_unrecorded_tail(
+    service, mock_repository
+):
+    upload = make_upload(size=6, offset=2)
+    # Хвост "XX" записан оборванным PATCH, но offset в БД — 2.
+    part_path(upload.id).write_bytes(b"abXX")
+    mock_repository.get_upload.return_value = upload
+
+    result = await service.append_chunk(upload.id, 2, chunks(b"cd", b"ef"))
+
+    assert part_path(upload.id).read_bytes() == b"abcdef"
+    assert result.offset == 6
+    mock_repository.advance_offset.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_append_chunk_rejects_wrong_offset(service, mock_repository):
+    upload = make_upload(size=6, offset=4)
+    mock_repository.get_upload.return_value = upload
+
+    with pytest.raises(UploadOffsetMismatch) as exc_info:
+        await service.append_chunk(upload.id, 2, chunks(b"cd"))
+
+    assert exc_info.value.offset == 4
+
+
+@pytest.mark.asyncio
+async def test_append_chunk_keeps_progress_when_stream_breaks(
+    service, mock_repository
+):
+    upload = make_upload(size=10)
+    part_path(upload.id).touch()
+    mock_repository.get_upload.return_value = upload
+
+    with pytest.raises(ConnectionError):
+        await service.append_chunk(upload.id, 0, broken_stream(b"abc"))
+
+    assert part_path(upload.id).read_bytes() == b"abc"
+    assert mock_repository.advance_offset.await_args.args[1] == 3
+
+
+@pytest.mark.asyncio
+async def test_append_chunk_rejects_data_beyond_declared_size(
+    service, mock_repository
+):
+    upload = make_upload(size=4)
+    part_path(upload.id).touch()
+    mock_repository.get_upload.return_value = upload
+
+    with pytest.raises(FileTooBig):
+        await service.append_chunk(upload.id, 0, chunks(b"abc", b"de"))
+
+    assert part_path(upload.id).read_bytes() == b"abc"
+
+
+@pytest.mark.asyncio
+async def test_finalize_requires_complete_upload(service, mock_repository):
+    mock_repository.get_upload.return_value = make_upload(size=10, offset=3)
+
+    with pytest.raises(UploadIncomplete):
+        await service.finalize(uuid.uuid4())
+
+
+@pytest.mark.asyncio
+async def test_finalize_moves_part_to_original_once(
+    service, mock_repository, storage
+):
+    data = make_png()
+    upload = make_upload(size=len(data), offset=len(data))
+    part_path(upload.id).write_bytes(data)
+    image = ImageSchema(
+        id=uuid.uuid4(),
+        status=ImageStatus.NEW,
+        original_filename="big.png",
+        content_type="image/png",
+        created_at=datetime.datetime.now(),
+    )
+    mock_repository.get_upload.return_value = upload
+    mock_repository.finalize.return_value = image
+
+    result, enqueue = await service.finalize(upload.id)
+
+    assert (result, enqueue) == (image, True)
+    assert (storage / str(image.id)).read_bytes() == data
+    assert not part_path(upload.id).exists()
+    metadata = mock_repository.finalize.await_args.args[1]
+    assert (metadata.width, metadata.height) == (20, 10)
+
+    # Повтор после успешного завершения не ставит задачу второй раз.
+    mock_repository.get_upload.return_value = upload.model_copy(
+        update={"image_id": image.id}
+    )
+    service.image_repository = AsyncMock()
+    service.image_repository.get_image_by_id.return_value = image
+
+    result, enqueue = await service.finalize(upload.id)
+
+    assert (result, enqueue) == (image, False)
+    mock_repository.finalize.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_overlapping_patches_at_same_offset_keep_accepted_bytes(
+    storage, mock_repository
+):
+    state = {"upload": make_upload(size=6, offset=2)}
+    upload_id = state["upload"].id
+    part_path(upload_id).write_bytes(b"ab")
+
+    async def get_upload(id):
+        return state["upload"]
+
+    async def advance_offset(upload, new_offset, ttl):
+        state["upload"] = upload.model_copy(update={"offset": new_offset})
+        return state["upload"]
+
+    mock_repository.get_upload.side_effect = get_upload
+    mock_repository.advance_offset.side_effect = advance_offset
+    first_done = asyncio.Event()
+
+    async def commit_after_first():
+        # Только первый commit повтора: до блокировки.
+        if not first_done.is_set():
+            await first_done.wait()
+
+    with patch(
+        "app.services.upload_service.UploadRepository",
+        return_value=mock_repository,
+    ):
+        first = UploadService(session=AsyncMock())
+        retry = UploadService(session=AsyncMock())
+    # Повтор прочитал offset 2 до того, как первый PATCH закоммитил.
+    retry.session.commit.side_effect = commit_after_first
+
+    retry_task = asyncio.create_task(
+        retry.append_chunk(upload_id, 2, chunks(b"XX"))
+    )
+    await asyncio.sleep(0)
+    await first.append_chunk(upload_id, 2, chunks(b"cd"))
+    first_done.set()
+
+    with pytest.raises(UploadOffsetMismatch) as exc_info:
+        await retry_task
+
+    assert exc_info.value.offset == 4
+    assert part_path(upload_id).read_bytes() == b"abcd"
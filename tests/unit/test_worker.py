@@ -1,4 +1,7 @@
+import asyncio
 import json
+import os
+import time
 import uuid
 from contextlib import asynccontextmanager
 from pathlib import Path
@@ -7,8 +10,12 @@ from unittest.mock import AsyncMock, Mock, patch
 import pytest
 from PIL import Image as PILImage
 
+import worker
 from app.models import Image, ImageStatus
-from worker import generate_thumbnails, process_message, resize_image
+from app.thumbnails import estimate_decode_bytes, save_jpeg
+from app.tracing import trace_id_var
+from worker import (LANE_SLOW, drain, generate_thumbnails, keep_lease,
+                    process_message, resize_image, run_blocking)
 
 
 def test_resize_image_creates_thumbnail(tmp_path: Path):
@@ -26,6 +33,45 @@ def test_resize_image_creates_thumbnail(tmp_path: Path):
         assert img.height <= 100
 
 
+def test_resize_image_converts_palette_image(tmp_path: Path):
+    original = tmp_path / "original.png"
+    with PILImage.new("P", (300, 150)) as img:
+        img.save(original, "PNG")
+
+    thumb = tmp_path / "thumb.jpg"
+    resize_image(original, thumb, 100)
+
+    with PILImage.open(thumb) as img:
+        assert img.mode == "RGB"
+        assert img.size == (100, 50)
+
+
+def test_resize_image_leaves_no_partial_file(tmp_path: Path):
+    original = tmp_path / "original.jpg"
+    with PILImage.new("RGB", (200, 200), color="red") as img:
+        img.save(original, "JPEG")
+
+    thumb = tmp_path / "thumb.jpg"
+    with patch("app.thumbnails.os.replace", side_effect=OSError("disk")):
+        with pytest.raises(OSError):
+            resize_image(original, thumb, 100)
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["original.jpg"]
+
+
+def test_estimate_decode_bytes_accounts_for_jpeg_draft():
+    png = estimate_decode_bytes(8000, 6000, "PNG", 1200)
+    jpeg = estimate_decode_bytes(8000, 6000, "JPEG", 1200)
+
+    assert png == 8000 * 6000 * 8
+    # draft() выбирает масштаб 1/2: min(8000, 6000) // 2400 == 2
+    assert jpeg == 4000 * 3000 * 8
+
+
+def test_estimate_decode_bytes_small_jpeg_is_not_scaled():
+    assert estimate_decode_bytes(640, 480, "JPEG", 1200) == 640 * 480 * 8
+
+
 @pytest.mark.asyncio
 async def test_generate_thumbnails_calls_resize_image(tmp_path):
     image_id = "test.jpg"
@@ -42,11 +88,31 @@ async def test_generate_thumbnails_calls_resize_image(tmp_path):
     assert mock_resize.call_count == 2
 
 
+@pytest.mark.asyncio
+async def test_generate_thumbnails_returns_placeholder(tmp_path):
+    image_id = str(uuid.uuid4())
+    with PILImage.new("RGB", (300, 200), color="green") as img:
+        img.save(tmp_path / image_id, "PNG")
+
+    with patch("worker.settings") as mock_settings:
+        mock_settings.PATH_TO_IMAGE = tmp_path
+        mock_settings.THUMBNAILS_RESOLUTION = [50, 100]
+
+        placeholder = await generate_thumbnails(image_id)
+
+    assert (tmp_path / f"{image_id}_50.jpg").exists()
+    assert isinstance(placeholder, str)
+    # 4x3 компонента: 1 + 1 + 4 + 11 * 2 символов
+    assert len(placeholder) == 28
+
+
 class DummyMessage:
-    def __init__(self, body: dict):
+    def __init__(self, body: dict, headers: dict | None = None):
         self.body = json.dumps(body).encode()
+        self.headers = headers or {}
+        self.timestamp = None
 
-    def process(self):
+    def process(self, **kwargs):
         return self
 
     async def __aenter__(self):
@@ -74,13 +140,16 @@ async def test_process_message_success(tmp_path):
         yield mock_session
 
     with patch("worker.session_gen", fake_session_gen), \
-         patch("worker.generate_thumbnails", AsyncMock()) as mock_thumbs:
+         patch(
+             "worker.generate_thumbnails", AsyncMock(return_value="LKO2?U")
+         ) as mock_thumbs:
 
         msg = DummyMessage({"image_id": fake_id})
         await process_message(msg)
 
     assert fake_img.status in (ImageStatus.PROCESSING, ImageStatus.DONE)
-    mock_thumbs.assert_awaited_once_with(fake_id)
+    assert fake_img.placeholder == "LKO2?U"
+    mock_thumbs.assert_awaited_once_with(fake_id, None)
 
 
 @pytest.mark.asyncio
@@ -105,3 +174,155 @@ async def test_process_message_image_not_found():
 
     mock_session.execute.assert_awaited_once()
     mock_session.commit.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_process_message_routes_heavy_image_to_slow_lane():
+    fake_id = str(uuid.uuid4())
+    fake_img = Image(
+        id=fake_id,
+        status=ImageStatus.NEW,
+        width=20000,
+        height=10000,
+        format="PNG",
+    )
+
+    mock_result = Mock()
+    mock_result.scalar_one_or_none.return_value = fake_img
+
+    mock_session = AsyncMock()
+    mock_session.execute.return_value = mock_result
+
+    @asynccontextmanager
+    async def fake_session_gen():
+        yield mock_session
+
+    with patch("worker.session_gen", fake_session_gen), \
+         patch("worker.slow_lane_producer") as mock_slow, \
+         patch("worker.generate_thumbnails", AsyncMock()) as mock_thumbs:
+        mock_slow.send_message = AsyncMock()
+
+        await process_message(DummyMessage({"image_id": fake_id}))
+        mock_slow.send_message.assert_awaited_once_with({"image_id": fake_id})
+        mock_thumbs.assert_not_awaited()
+        assert fake_img.status == ImageStatus.NEW
+        # Перенос продлевает аренду строки, как reaper.
+        lease = mock_session.execute.await_args_list[-1].args[0]
+        assert lease.is_dml
+        assert "updated_at" in str(lease)
+
+        await process_message(
+            DummyMessage({"image_id": fake_id}), lane=LANE_SLOW
+        )
+        mock_thumbs.assert_awaited_once_with(fake_id, None)
+
+
+@pytest.mark.asyncio
+async def test_process_message_continues_trace_from_headers():
+    trace_id = "c" * 32
+    seen = {}
+
+    async def fake_handle_job(image_id, lane, executor=None):
+        seen["trace_id"] = trace_id_var.get()
+
+    with patch("worker.handle_job", fake_handle_job):
+        msg = DummyMessage(
+            {"image_id": "x"},
+            headers={"traceparent": f"00-{trace_id}-{'d' * 16}-01"},
+        )
+        await process_message(msg)
+
+    assert seen["trace_id"] == trace_id
+
+
+@pytest.mark.asyncio
+async def test_drain_requeues_jobs_past_deadline():
+    fake_id = str(uuid.uuid4())
+    fake_img = Image(id=fake_id, status=ImageStatus.NEW)
+
+    mock_result = Mock()
+    mock_result.scalar_one_or_none.return_value = fake_img
+
+    mock_session = AsyncMock()
+    mock_session.execute.return_value = mock_result
+
+    @asynccontextmanager
+    async def fake_session_gen():
+        yield mock_session
+
+    async def hang(*args):
+        await asyncio.sleep(10)
+
+    msg = DummyMessage({"image_id": fake_id})
+    msg.nack = AsyncMock()
+    with patch("worker.session_gen", fake_session_gen), \
+         patch("worker.generate_thumbnails", hang), \
+         patch("worker.reset_processing", AsyncMock()) as mock_reset:
+        slow = asyncio.create_task(process_message(msg))
+        fast = asyncio.create_task(asyncio.sleep(0))
+        await asyncio.sleep(0.01)
+
+        requeued = await drain({slow, fast}, timeout=0.05)
+
+    assert requeued == 1
+    assert fast.done() and not fast.cancelled()
+    mock_reset.assert_awaited_once_with(fake_id)
+    msg.nack.assert_awaited_once_with(requeue=True)
+
+
+@pytest.mark.asyncio
+async def test_keep_lease_renews_processing_row_while_job_runs():
+    repository = AsyncMock()
+
+    @asynccontextmanager
+    async def fake_session_gen():
+        yield AsyncMock()
+
+    with patch("worker.session_gen", fake_session_gen), \
+         patch("worker.ImageRepository", return_value=repository), \
+         patch.object(worker.settings, "REAPER_STALE_AFTER", 0.03):
+        async with keep_lease("id"):
+            await asyncio.sleep(0.05)
+        renewed = repository.renew_lease.await_count
+        await asyncio.sleep(0.05)
+
+    # Продлевается, пока задача идёт, и перестаёт после.
+    assert renewed >= 2
+    assert repository.renew_lease.await_count == renewed
+    repository.renew_lease.assert_awaited_with("id", ImageStatus.PROCESSING)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_job_waits_for_running_resize():
+    finished = []
+
+    def slow_resize():
+        time.sleep(0.1)
+        finished.append(True)
+
+    task = asyncio.create_task(run_blocking(None, slow_resize))
+    await asyncio.sleep(0.01)
+    task.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    # Задача отменена только после того, как поток дописал файл.
+    assert finished == [True]
+
+
+def test_save_jpeg_uses_own_temp_file_per_write(tmp_path: Path):
+    thumb = tmp_path / "thumb.jpg"
+    sources = []
+
+    def replace(src, dst):
+        sources.append(src)
+        os.rename(src, dst)
+
+    with PILImage.new("RGB", (10, 10)) as img, \
+            patch("app.thumbnails.os.replace", replace):
+        save_jpeg(img, thumb)
+        save_jpeg(img, thumb)
+
+    assert len(set(sources)) == 2
+    assert [p.name for p in tmp_path.iterdir()] == ["thumb.jpg"]
@@ -1,23 +1,95 @@
+import argparse
 import asyncio
 import json
 import logging
+import signal
+import time
+from concurrent.futures import Executor
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import Any, AsyncIterator, Callable
 
 import aio_pika
-from PIL import Image as PILImage
-from sqlalchemy import select
+from prometheus_client import start_http_server
+from sqlalchemy import select, update
 
-from app.database import session_gen
+from app.database import initialize_db, session_gen, shutdown
 from app.exceptions import ImageNotFound
 from app.logging.logging import setup_logging
+from app.memory_budget import MemoryBudget
+from app.metrics import (WORKER_JOBS, WORKER_JOBS_IN_FLIGHT, WORKER_QUEUE_WAIT,
+                         WORKER_SLOW_LANE_ROUTED)
 from app.models import Image, ImageStatus
+from app.rabbit_producer import RabbitMQProducer
+from app.repositories.image_repository import ImageRepository, image_id_filter
+from app.services.partition_service import ensure_partitions
 from app.settings import settings
+from app.thumbnails import (estimate_decode_bytes, make_placeholder,
+                            read_header, resize_image)
+from app.tracing import export_span, setup_tracing, span, trace_context
 
 setup_logging()
+setup_tracing(settings.TRACE_EXPORT_PATH)
 logger = logging.getLogger("image_worker")
 
+MB = 1024 * 1024
+LANE_FAST = "fast"
+LANE_SLOW = "slow"
+# Очередь внутри процесса API (QUEUE_BACKEND=inprocess): медленной очереди
+# нет, тяжёлые изображения ограничивает только decode_budget.
+LANE_INPROCESS = "inprocess"
 
-async def generate_thumbnails(image_id: str) -> None:
+decode_budget = MemoryBudget(settings.WORKER_MEMORY_BUDGET_MB * MB)
+slow_lane_producer = RabbitMQProducer(
+    settings.RABBIT_URL,
+    settings.SLOW_QUEUE_NAME,
+)
+
+
+def estimate_job_memory(img: Image) -> int:
+    width, height, image_format = img.width, img.height, img.format
+    if not (width and height):
+        # Строки, загруженные до появления колонок с метаданными.
+        original_path = Path(settings.PATH_TO_IMAGE) / str(img.id)
+        try:
+            width, height, image_format = read_header(original_path)
+        except Exception:
+            return 0
+    return estimate_decode_bytes(
+        width,
+        height,
+        image_format,
+        max(settings.THUMBNAILS_RESOLUTION),
+    )
+
+
+async def run_blocking(
+        executor: Executor | None,
+        func: Callable[..., Any],
+        *args: Any,
+) -> Any:
+    future: asyncio.Future
+    if executor is None:
+        # to_thread, в отличие от run_in_executor, копирует contextvars:
+        # спаны стадий остаются в трейсе задачи.
+        future = asyncio.ensure_future(asyncio.to_thread(func, *args))
+    else:
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(executor, func, *args)
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        # Поток или процесс не прервать. Ждём, пока стадия допишет файл:
+        # иначе задача вернётся в очередь, и другой воркер начнёт писать
+        # те же миниатюры, пока этот ещё пишет.
+        await asyncio.gather(future, return_exceptions=True)
+        raise
+
+
+async def generate_thumbnails(
+        image_id: str,
+        executor: Executor | None = None,
+) -> str | None:
     original_path = Path(settings.PATH_TO_IMAGE) / image_id
     if not original_path.exists():
         logger.error(f"Original image not found: {original_path}")
@@ -28,79 +100,279 @@ async def generate_thumbnails(image_id: str) -> None:
             Path(settings.PATH_TO_IMAGE)
             / f"{image_id}_{resolution}.jpg"
         )
-        await asyncio.to_thread(
+        await run_blocking(
+            executor,
             resize_image,
             original_path,
             thumb_path,
             resolution,
         )
 
+    smallest = min(settings.THUMBNAILS_RESOLUTION)
+    smallest_path = Path(settings.PATH_TO_IMAGE) / f"{image_id}_{smallest}.jpg"
+    try:
+        with span("thumbnail.placeholder"):
+            return await run_blocking(
+                executor,
+                make_placeholder,
+                smallest_path,
+            )
+    except Exception as e:
+        # Заглушка необязательна: без неё изображение всё равно готово.
+        logger.warning(f"Placeholder failed for {image_id}:", exc_info=e)
+        return None
 
-def resize_image(
-        original_path: Path,
-        thumb_path: Path,
-        resolution: int,
-) -> None:
 
-    with PILImage.open(original_path) as img:
-        img = img.convert("RGB")
-        img.thumbnail((resolution, resolution), PILImage.LANCZOS)
-        img.save(thumb_path, "JPEG", quality=85)
-        logger.info(f"Thumbnail saved: {thumb_path}")
+def message_published_at(
+        message: aio_pika.abc.AbstractIncomingMessage,
+) -> float | None:
+    published_at = message.headers.get("x-published-at")
+    if isinstance(published_at, (int, float)):
+        return float(published_at)
+    if message.timestamp:
+        return message.timestamp.timestamp()
+    return None
 
 
 async def process_message(
         message: aio_pika.abc.AbstractIncomingMessage,
+        lane: str = LANE_FAST,
 ) -> None:
-    async with message.process():
+    async with message.process(ignore_processed=True):
         body = json.loads(message.body.decode())
-        image_id = body["image_id"]
+        traceparent = message.headers.get("traceparent")
+        if not isinstance(traceparent, str):
+            traceparent = None
+        try:
+            await run_job(
+                body["image_id"],
+                lane,
+                message_published_at(message),
+                traceparent,
+            )
+        except asyncio.CancelledError:
+            # Остановка воркера: process() отклонил бы сообщение без
+            # возврата в очередь.
+            await message.nack(requeue=True)
+            raise
+
 
-        logger.info(f"Processing image {image_id}")
+async def run_job(
+        image_id: str,
+        lane: str,
+        published_at: float | None = None,
+        traceparent: str | None = None,
+        executor: Executor | None = None,
+) -> None:
+    """Обработка задачи независимо от транспорта очереди."""
+    with trace_context(traceparent):
+        if published_at is not None:
+            now = time.time()
+            WORKER_QUEUE_WAIT.labels(lane).observe(max(now - published_at, 0))
+            export_span(
+                "queue.wait",
+                int(published_at * 1e9),
+                int(now * 1e9),
+                lane=lane,
+            )
+        with WORKER_JOBS_IN_FLIGHT.labels(lane).track_inprogress(), \
+                span("worker.job", image_id=image_id, lane=lane):
+            await handle_job(image_id, lane, executor)
+
+
+async def renew_lease_loop(image_id: str, interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with session_gen() as session:
+                await ImageRepository(session).renew_lease(
+                    image_id,
+                    ImageStatus.PROCESSING,
+                )
+        except Exception as e:
+            # Следующая попытка — через interval, до истечения аренды
+            # их ещё две.
+            logger.warning(f"Lease renewal failed for {image_id}:", exc_info=e)
+
+
+@asynccontextmanager
+async def keep_lease(image_id: str) -> AsyncIterator[None]:
+    """
+    Пока задача работает, продлевает аренду PROCESSING-строки: иначе
+    через REAPER_STALE_AFTER reaper отдаст долгую задачу второму воркеру.
+    """
+    task = asyncio.create_task(
+        renew_lease_loop(image_id, settings.REAPER_STALE_AFTER / 3)
+    )
+    try:
+        yield
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+async def handle_job(
+        image_id: str,
+        lane: str = LANE_FAST,
+        executor: Executor | None = None,
+) -> None:
+    logger.info(f"Processing image {image_id}")
+
+    async with session_gen() as session:
+        stmt = select(Image).where(image_id_filter(image_id))
+        result = await session.execute(stmt)
+        img = result.scalar_one_or_none()
+        if not img:
+            logger.error(f"Image {image_id} not found")
+            return
+        if img.status == ImageStatus.DONE:
+            # Повторная доставка (например, от reaper) — работа сделана.
+            logger.info(f"Image {image_id} already done, skipping")
+            return
+
+        job_memory = estimate_job_memory(img)
+        max_job_memory = settings.WORKER_MAX_JOB_MEMORY_MB * MB
+        if lane == LANE_FAST and job_memory > max_job_memory:
+            # Перенос — новая аренда: иначе при очереди в медленной полосе
+            # дольше REAPER_STALE_AFTER reaper вернёт id в быструю, и
+            # дубликаты копятся.
+            await ImageRepository(session).renew_lease(
+                image_id,
+                ImageStatus.NEW,
+            )
+            await slow_lane_producer.send_message({"image_id": image_id})
+            WORKER_SLOW_LANE_ROUTED.inc()
+            logger.info(
+                f"Image {image_id} needs ~{job_memory // MB} MB, "
+                "routed to slow lane"
+            )
+            return
+
+        img.status = ImageStatus.PROCESSING
+        with span("db.status_commit", status=ImageStatus.PROCESSING.value):
+            await session.commit()
+
+    try:
+        async with keep_lease(image_id), decode_budget.reserve(job_memory):
+            placeholder = await generate_thumbnails(image_id, executor)
 
         async with session_gen() as session:
-            stmt = select(Image).where(Image.id == image_id)
+            stmt = select(Image).where(image_id_filter(image_id))
             result = await session.execute(stmt)
-            img = result.scalar_one_or_none()
-            if not img:
-                logger.error(f"Image {image_id} not found")
-                return
+            img = result.scalar_one()
+            img.status = ImageStatus.DONE
+            img.placeholder = placeholder
+            with span("db.status_commit", status=ImageStatus.DONE.value):
+                await session.commit()
 
-            img.status = ImageStatus.PROCESSING
+        WORKER_JOBS.labels(lane, ImageStatus.DONE.value).inc()
+        logger.info(f"Done image {image_id}")
+
+    except asyncio.CancelledError:
+        # Не успели до WORKER_SHUTDOWN_TIMEOUT: задача вернётся в очередь,
+        # а строка — в NEW, чтобы её не подобрал ещё и reaper.
+        await reset_processing(image_id)
+        WORKER_JOBS.labels(lane, ImageStatus.NEW.value).inc()
+        logger.warning(f"Image {image_id} interrupted by shutdown")
+        raise
+
+    except Exception as e:
+        async with session_gen() as session:
+            stmt = select(Image).where(image_id_filter(image_id))
+            result = await session.execute(stmt)
+            img = result.scalar_one()
+            img.status = ImageStatus.ERROR
             await session.commit()
+        WORKER_JOBS.labels(lane, ImageStatus.ERROR.value).inc()
+        logger.error(f"[!] Error processing {image_id}:", exc_info=e)
 
-        try:
-            await generate_thumbnails(image_id)
 
-            async with session_gen() as session:
-                stmt = select(Image).where(Image.id == image_id)
-                result = await session.execute(stmt)
-                img = result.scalar_one()
-                img.status = ImageStatus.DONE
-                await session.commit()
+async def reset_processing(image_id: str) -> None:
+    async with session_gen() as session:
+        await session.execute(
+            update(Image)
+            .where(
+                image_id_filter(image_id),
+                Image.status == ImageStatus.PROCESSING,
+            )
+            .values(status=ImageStatus.NEW)
+        )
+        await session.commit()
 
-            logger.info(f"Done image {image_id}")
 
-        except Exception as e:
-            async with session_gen() as session:
-                stmt = select(Image).where(Image.id == image_id)
-                result = await session.execute(stmt)
-                img = result.scalar_one()
-                img.status = ImageStatus.ERROR
-                await session.commit()
-            logger.error(f"[!] Error processing {image_id}:", exc_info=e)
+async def drain(tasks: set[asyncio.Task], timeout: float) -> int:
+    """
+    Ждёт задачи не дольше timeout, оставшиеся отменяет. Возвращает
+    число отменённых.
+    """
+    if not tasks:
+        return 0
+    _, pending = await asyncio.wait(set(tasks), timeout=timeout)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    return len(pending)
 
 
-async def main() -> None:
-    connection = await aio_pika.connect_robust(settings.RABBIT_URL)
+async def main(lane: str = LANE_FAST) -> None:
+    start_http_server(settings.WORKER_METRICS_PORT)
+    # Брокер и пул БД — параллельно и до первой задачи.
+    connecting = asyncio.create_task(
+        aio_pika.connect_robust(settings.RABBIT_URL),
+    )
+    startup = [initialize_db()]
+    if lane == LANE_FAST:
+        startup.append(slow_lane_producer.connect())
+    await asyncio.gather(connecting, *startup)
+    connection = await connecting
+    await ensure_partitions()
     channel = await connection.channel()
-    queue = await channel.declare_queue("images", durable=True)
+    if lane == LANE_SLOW:
+        # Медленная очередь: тяжёлые изображения строго по одному.
+        await channel.set_qos(prefetch_count=1)
+        queue_name = settings.SLOW_QUEUE_NAME
+    else:
+        await channel.set_qos(prefetch_count=settings.WORKER_PREFETCH)
+        queue_name = settings.QUEUE_NAME
+    queue = await channel.declare_queue(queue_name, durable=True)
+
+    in_flight: set[asyncio.Task] = set()
+
+    async def on_message(message: aio_pika.abc.AbstractIncomingMessage):
+        task = asyncio.current_task()
+        assert task is not None
+        in_flight.add(task)
+        try:
+            await process_message(message, lane)
+        finally:
+            in_flight.discard(task)
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stopping.set)
 
-    logger.info("Worker started. Waiting for messages.")
-    await queue.consume(process_message)
+    logger.info(f"Worker started ({lane} lane). Waiting for messages.")
+    consumer_tag = await queue.consume(on_message)
+    await stopping.wait()
 
-    await asyncio.Future()
+    # Новых сообщений не берём; уже полученные (включая prefetch) либо
+    # доделываются, либо по дедлайну возвращаются в очередь.
+    logger.info(f"Shutting down, {len(in_flight)} jobs in flight")
+    await queue.cancel(consumer_tag)
+    requeued = await drain(in_flight, settings.WORKER_SHUTDOWN_TIMEOUT)
+    logger.info(f"Drained, {requeued} jobs requeued")
+    await slow_lane_producer.close()
+    await connection.close()
+    await shutdown()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--lane",
+        choices=[LANE_FAST, LANE_SLOW],
+        default=LANE_FAST,
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.lane))